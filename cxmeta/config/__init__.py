@@ -1,8 +1,32 @@
-import uuid
+import os
 
 
 def random_name():
     """
     Return the last part of a UUID
     """
+    import uuid
+
     return str(uuid.uuid4()).split("-")[-1]
+
+
+# Convert the directory name of the path into the module name
+def module_name(source_path):
+    path_parts = os.path.split(source_path)
+    if not path_parts[-1]:
+        name = os.path.basename(path_parts[0])
+    else:
+        name = os.path.basename(path_parts[-1])
+    return name
+
+
+def get_output_path(full_project_path, config):
+    output_path = config.get("output_path")
+    if output_path:
+        return output_path
+
+    output_directory = config.get("output_directory")
+    if output_directory:
+        return os.path.join(full_project_path, output_directory)
+    else:
+        return full_project_path
@@ -0,0 +1,147 @@
+import os
+import logging
+from typing import Dict, List, Optional
+
+from cxmeta.config.config_loader import ConfigLoader
+from cxmeta.config.project import Project, Status
+from cxmeta.pipeline.builder import Builder
+from cxmeta.pipeline.cache import shared_cache_path
+from cxmeta.pipeline.combiner import Combiner
+from cxmeta.pipeline.source_module import (
+    get_job_count,
+    load_cached,
+    run_combiners,
+    store_cached,
+)
+
+
+def load_manifest(path) -> List[str]:
+    """
+    Project roots listed one per line, blank lines and lines starting with
+    # are ignored. Relative roots are resolved against the manifest location.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    roots = list()
+    with open(path, "r") as manifest:
+        for line in manifest:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                roots.append(os.path.join(base, line))
+    return roots
+
+
+def failed_status(root, error) -> Status:
+    return Status(
+        False, "project_failed", {"full_path": root, "error": str(error)}
+    )
+
+
+def renew_combiners(module, combiners: List[Combiner]) -> List[Combiner]:
+    """
+    Replace the combiners in the files of module by unprocessed ones,
+    returning the new combiners
+    """
+    renewed = {
+        id(combiner): Combiner(
+            combiner.project, combiner.module, combiner.source
+        )
+        for combiner in combiners
+    }
+    module.files = [
+        renewed.get(id(combiner), combiner) for combiner in module.files
+    ]
+    return [renewed[id(combiner)] for combiner in combiners]
+
+
+class Batch(object):
+    """
+    Processes many projects in one process. Each project keeps its own
+    config, the files of all projects are processed on one shared pool of
+    workers and, when caching is enabled, one parse cache directory:
+    cache_path or the user cache directory.
+
+    A project that fails to load, process or export gets a failed Status,
+    the others are still processed.
+    """
+
+    def __init__(self, roots: List[str], settings: Optional[Dict] = None):
+        self.log = logging.getLogger("cxmeta")
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.settings = settings or dict()
+        self.cache_path = (
+            self.settings.get("cache_path") or shared_cache_path()
+        )
+
+    def load_project(self, root) -> Project:
+        if not os.path.exists(root):
+            raise FileNotFoundError("No such project root {}".format(root))
+        config = ConfigLoader(root).doc
+        config.update(self.settings)
+        if config.get("cache") and not config.get("cache_path"):
+            config["cache_path"] = self.cache_path
+        return Builder().build_from_config(config)
+
+    def fail(self, statuses, i, action, error):
+        root = self.roots[i]
+        self.log.error(
+            "failed to {} project {}: {}".format(action, root, error)
+        )
+        statuses[i] = failed_status(root, error)
+
+    def process(self) -> List[Status]:
+        statuses: List[Optional[Status]] = [None] * len(self.roots)
+        loaded = self.load_projects(statuses)
+
+        # Cached files are loaded per project, every miss goes to one pool
+        pending = dict()
+        for i, project, module in loaded:
+            try:
+                pending[i] = load_cached(project, module.files)
+            except Exception as e:
+                self.fail(statuses, i, "process", e)
+        modules = {i: module for i, _, module in loaded}
+        self.run_pending(statuses, pending, modules)
+
+        for i, project, module in loaded:
+            if statuses[i] is None:
+                self.export(statuses, i, project, module, pending[i])
+        return statuses
+
+    def load_projects(self, statuses):
+        loaded = list()
+        for i, root in enumerate(self.roots):
+            try:
+                project = self.load_project(root)
+                loaded.append((i, project, project.discover_module()))
+            except (OSError, ValueError, AssertionError) as e:
+                self.fail(statuses, i, "load", e)
+        return loaded
+
+    def export(self, statuses, i, project, module, processed):
+        try:
+            store_cached(project, processed)
+            project.add_file_metrics(module.files)
+            statuses[i] = project.status(project.export(module))
+        except Exception as e:
+            self.fail(statuses, i, "export", e)
+
+    def run_pending(self, statuses, pending, modules):
+        jobs = get_job_count(self.settings)
+        try:
+            run_combiners(
+                [combiner for i in pending for combiner in pending[i]], jobs
+            )
+            return
+        except Exception as e:
+            self.log.error(
+                "batch processing failed, retrying per project: {}".format(e)
+            )
+        # Find the projects that fail, the others still get their outputs.
+        # Some combiners already hold chunks, the retry starts from fresh
+        # ones so no chunk is added twice.
+        for i in pending:
+            pending[i] = renew_combiners(modules[i], pending[i])
+            try:
+                run_combiners(pending[i], jobs)
+            except Exception as e:
+                self.fail(statuses, i, "process", e)
@@ -1,12 +1,14 @@
 import os
-import yaml
+import copy
+import json
 import logging
-from typing import Any, Optional, Tuple, Mapping
+from typing import Any, Dict, Optional, Tuple, Mapping
 
-from cxmeta.pipeline.source_module import module_name
+from cxmeta.config import module_name
 from cxmeta.style.registry import DEFAULT_STYLE
 
 CONFIG_NAME = ".cxmeta.yaml"
+SNAPSHOT_SUFFIX = ".json"
 MAX_RECURSION = 3
 
 VALID_SETTINGS: Mapping[str, Tuple[Any, str]] = {
@@ -35,12 +37,45 @@ VALID_SETTINGS: Mapping[str, Tuple[Any, str]] = {
     ),
     "include_paths": (list(), "Whitelist of paths while processing modules"),
     "include_extensions": ([".h"], "Extensions to parse"),
+    "exclude_paths": (list(), "Glob patterns of paths to skip"),
+    "file_list": (
+        None,
+        "File with the paths to process, one per line or compile_commands",
+    ),
     "output_file_name": ("README.md", "Name of the project output file"),
     "publish_single_file": (
         True,
         "Include all files in the project output file",
     ),
     "style": (DEFAULT_STYLE, "Style to use for export"),
+    "exports": (
+        None,
+        "Styles or export settings to render from one parse",
+    ),
+    "cross_reference": (False, "Link mentions of documented names"),
+    "symbol_index": (
+        None,
+        "File name of a symbol index written next to the outputs",
+    ),
+    "rst_processing": (
+        False,
+        "Parse the fields and references of docs, counted in the status",
+    ),
+    #
+    # Performance settings
+    #
+    "jobs": (1, "Worker processes used to process files, 0 for all cores"),
+    "cache": (False, "Cache parsed files between runs"),
+    "cache_path": (None, "Cache location, defaults to the output path"),
+    "tokenizer": ("line", "Tokenizer engine, 'line' or 'buffer'"),
+    "read_mode": (
+        "text",
+        "Input of the buffer tokenizer, 'text', 'bytes' or 'mmap'",
+    ),
+    "metrics": (False, "Record per stage and per file metrics"),
+    "write_jobs": (1, "Threads writing output files, 0 for all cores"),
+    "export_jobs": (1, "Threads rendering exports, 0 for all cores"),
+    "skip_unchanged": (False, "Only rewrite outputs whose content changed"),
 }
 
 REQUIRED = {
@@ -58,11 +93,78 @@ def get_default(name: str) -> Optional[Any]:
     return None
 
 
+def file_stamp(path) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def snapshot_path(file_path: str) -> str:
+    return file_path + SNAPSHOT_SUFFIX
+
+
+def read_snapshot(file_path: str, stamp) -> Optional[Dict]:
+    """
+    The document of a compiled config snapshot, None when there is no
+    snapshot or it was compiled from a different version of the file
+    """
+    try:
+        with open(snapshot_path(file_path), "r") as snapshot_file:
+            snapshot = json.load(snapshot_file)
+    except (OSError, ValueError):
+        return None
+    if snapshot.get("stamp") != list(stamp):
+        return None
+    return snapshot.get("doc")
+
+
+def parse_yaml(file_path: str) -> Dict:
+    # Only loaded when a config file is present
+    import yaml
+
+    # The C loader is several times faster when libyaml is available
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(file_path, "r") as input_stream:
+        return yaml.load(input_stream, Loader=loader) or dict()
+
+
+def compile_config(file_path: str) -> str:
+    """
+    Write a JSON snapshot of the config file next to it, later loads read
+    the snapshot instead of parsing YAML while the file is unchanged
+    """
+    from cxmeta.pipeline.writer import atomic_write
+
+    stamp = file_stamp(file_path)
+    snapshot = {"stamp": list(stamp), "doc": parse_yaml(file_path)}
+    path = snapshot_path(file_path)
+    atomic_write(path, json.dumps(snapshot).encode("utf8"))
+    return path
+
+
+# Parsed config documents by file path, with the stamp they were read at
+DOCUMENTS: Dict[str, Tuple[Tuple[int, int], Dict]] = dict()
+
+
+def read_config(file_path: str) -> Dict:
+    """
+    The parsed config file, memoized until its modification time or size
+    changes. Callers get their own copy to modify.
+    """
+    stamp = file_stamp(file_path)
+    memo = DOCUMENTS.get(file_path)
+    if memo is None or memo[0] != stamp:
+        doc = read_snapshot(file_path, stamp)
+        if doc is None:
+            doc = parse_yaml(file_path)
+        memo = (stamp, doc)
+        DOCUMENTS[file_path] = memo
+    return copy.deepcopy(memo[1])
+
+
 class ConfigLoader(object):
     def __init__(self, full_path="."):
         self.full_path = full_path
-        self.doc = dict()
-        self.load()
+        self.doc = self.load()
 
     def load(self):
         log = logging.getLogger("cxmeta")
@@ -75,11 +177,10 @@ class ConfigLoader(object):
             )
             return self.default_config()
         else:
-            with open(file_path, "r") as input_stream:
-                doc = yaml.safe_load(input_stream)
-                doc["full_path"] = os.path.dirname(file_path)
-                ConfigLoader.update_with_defaults(doc)
-                return doc
+            doc = read_config(file_path)
+            doc["full_path"] = os.path.dirname(file_path)
+            ConfigLoader.update_with_defaults(doc)
+            return doc
 
     def default_config(self):
         return {
@@ -99,13 +200,17 @@ class ConfigLoader(object):
 
     @staticmethod
     def search_path(path, depth=0):
-        if depth > MAX_RECURSION:
-            return None
-        abspath = os.path.abspath(path)
-        file_path = os.path.join(abspath, CONFIG_NAME)
-        if os.path.exists(file_path):
-            return file_path
-        # recurse up one directory
-        parent = os.path.dirname(path)
-        return ConfigLoader.search_path(parent, depth + 1)
-
+        """
+        The config file in path or the closest of its parents, looking at
+        most MAX_RECURSION directories up
+        """
+        path = os.path.abspath(path)
+        for _ in range(depth, MAX_RECURSION + 1):
+            file_path = os.path.join(path, CONFIG_NAME)
+            if os.path.isfile(file_path):
+                return file_path
+            parent = os.path.dirname(path)
+            if parent == path:
+                break
+            path = parent
+        return None
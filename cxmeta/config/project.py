@@ -1,27 +1,21 @@
 import os
-from cxmeta.pipeline.gfm_exporter import GfmExporter
-from cxmeta.pipeline.source_module import Module
+from contextlib import nullcontext
+from typing import Dict, List
+from cxmeta.pipeline.cache import ParseCache, get_cache_path
+from cxmeta.pipeline.discovery import InputManifest, load_file_list
+from cxmeta.pipeline.exports import Exports
+from cxmeta.pipeline.metrics import Metrics
+from cxmeta.pipeline.source_module import Module, process_combiners
 from cxmeta.pipeline.stream import InputDirectory, InputFile
-from . import random_name
-
-
-def get_output_path(full_project_path, config):
-    output_path = config.get("output_path")
-    if output_path:
-        return output_path
-
-    output_directory = config.get("output_directory")
-    if output_directory:
-        return os.path.join(full_project_path, output_directory)
-    else:
-        return full_project_path
+from . import get_output_path, random_name
 
 
 class Status(object):
-    def __init__(self, success, msg, props):
+    def __init__(self, success, msg, props, metrics=None):
         self.success = success
         self.msg = msg
         self.props = props
+        self.metrics = metrics
 
     def __str__(self):
         ret = {"success": self.success, "message": self.msg}
@@ -48,29 +42,89 @@ class Project(object):
         self.output_path = get_output_path(self.full_path, config)
         self.newline = config.get("newline", "\n")
         self.style = None
+        self.cache = None
+        if config.get("cache"):
+            self.cache = ParseCache(get_cache_path(self), config)
+        self.metrics = None
+        if config.get("metrics"):
+            self.metrics = Metrics()
+        self.rst = None
+        # The parsed docs of each source by full path, in chunk order
+        self.rst_docs: Dict[str, List] = dict()
+        if config.get("rst_processing"):
+            from cxmeta.pipeline.rst_processor import RstProcessor
+
+            self.rst = RstProcessor()
 
     def process(self):
         module = self.load_module()
-        self.export(module)
-        return Status(
-            True,
-            "project_complete",
-            {
-                "project_name": self.name,
-                "full_path": self.full_path,
-                "is_dir": os.path.isdir(self.full_path),
-            },
-        )
+        return self.status(self.export(module))
+
+    def status(self, exports, **extra_props):
+        props = {
+            "project_name": self.name,
+            "full_path": self.full_path,
+            "is_dir": os.path.isdir(self.full_path),
+        }
+        if exports is not None:
+            props.update(exports.props())
+        if self.cache is not None:
+            props.update(self.cache.props())
+        if self.metrics is not None:
+            props.update(self.metrics.props())
+        if self.rst is not None:
+            props.update(self.rst.props())
+        props.update(extra_props)
+        return Status(True, "project_complete", props, self.metrics)
+
+    def stage(self, name):
+        if self.metrics is None:
+            return nullcontext(dict())
+        return self.metrics.stage(name)
+
+    def input_source(self):
+        """The directory, single file or manifest the project reads"""
+        file_list = self.config.get("file_list")
+        if file_list:
+            return InputManifest(self.full_path, load_file_list(file_list))
+        elif os.path.isdir(self.full_path):
+            return InputDirectory(self.full_path)
+        return SingleFile(self.full_path)
 
     def load_module(self):
-        if os.path.isdir(self.full_path):
-            input_files = InputDirectory(self.full_path)
-        elif os.path.isfile(self.full_path):
-            input_files = SingleFile(self.full_path)
-        module = Module(self, input_files)
-        module.process()
+        module = self.discover_module()
+        self.process_files(module.files)
+        return module
+
+    def discover_module(self):
+        module = Module(self, self.input_source())
+        with self.stage("discover") as stage:
+            module.discover()
+            stage["files"] = len(module.files)
         return module
 
-    def export(self, module):
-        exporter = GfmExporter(self)
-        exporter.export_module(module)
+    def process_files(self, combiners):
+        with self.stage("process"):
+            process_combiners(self, combiners)
+        self.add_file_metrics(combiners)
+
+    def add_file_metrics(self, combiners):
+        if self.metrics is not None:
+            for combiner in combiners:
+                if combiner.metrics is not None:
+                    self.metrics.add_file(combiner.metrics)
+
+    def export(self, module, changed=None):
+        if self.rst is not None:
+            with self.stage("rst"):
+                self.rst_docs = {
+                    combiner.source.full_path: self.rst.process(
+                        combiner.stream().content
+                    )
+                    for combiner in module.files
+                }
+        with self.stage("export") as stage:
+            exports = Exports(self)
+            exports.export_module(module, changed)
+            stage["files"] = len(module.files)
+        return exports
@@ -0,0 +1,140 @@
+import os
+import hashlib
+import logging
+from typing import Dict, List, Tuple
+
+from cxmeta.config.project import Project, Status
+from cxmeta.pipeline.cache import config_fingerprint
+from cxmeta.pipeline.combiner import Combiner
+from cxmeta.pipeline.serialize import FileResult, dumps_binary, loads_binary
+from cxmeta.pipeline.writer import atomic_write
+
+
+def parse_shard(text: str) -> Tuple[int, int]:
+    """Shard index and count from i/N, shards are counted from 0"""
+    try:
+        index, count = [int(part) for part in text.split("/")]
+    except ValueError:
+        raise ValueError("Shard '{}' is not of the form i/N".format(text))
+    if count < 1 or not 0 <= index < count:
+        raise ValueError("Shard '{}' is out of range".format(text))
+    return index, count
+
+
+def shard_path(project: Project, index: int, count: int) -> str:
+    return os.path.join(
+        project.output_path, "shard-{}-of-{}.chunks".format(index, count)
+    )
+
+
+def relative_key(project: Project, combiner: Combiner) -> str:
+    """
+    Path of the source relative to the project root with / separators, it
+    is the same on every node whatever the location of the checkout
+    """
+    relative = os.path.relpath(combiner.source.full_path, project.full_path)
+    return relative.replace(os.sep, "/")
+
+
+def shard_of(relative: str, count: int) -> int:
+    # Python's own hash of a str is salted per process, sha1 is stable
+    digest = hashlib.sha1(relative.encode("utf8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+class Shard(object):
+    """
+    One of count partitions of a project's files. Each node processes its
+    shard and writes the chunks of its files, keyed by their path relative
+    to the project root, for merge_shards to render.
+    """
+
+    def __init__(self, project: Project, index: int, count: int):
+        self.log = logging.getLogger("cxmeta")
+        self.project = project
+        self.index = index
+        self.count = count
+        # Only parse settings and the parser version are part of the key,
+        # nodes may differ in any other setting
+        self.fingerprint = config_fingerprint(project.config)
+
+    def select(self, combiners: List[Combiner]) -> List[Combiner]:
+        return [
+            combiner
+            for combiner in combiners
+            if shard_of(relative_key(self.project, combiner), self.count)
+            == self.index
+        ]
+
+    def key(self, combiner: Combiner) -> str:
+        return ":".join([self.fingerprint, combiner.source.digest()])
+
+    def process(self, output=None) -> Status:
+        project = self.project
+        output = output or shard_path(project, self.index, self.count)
+        module = project.discover_module()
+        selected = self.select(module.files)
+        project.process_files(selected)
+        results = [
+            FileResult(
+                relative_key(project, combiner),
+                combiner.stream().content,
+                self.key(combiner),
+            )
+            for combiner in selected
+        ]
+        atomic_write(output, dumps_binary(results))
+        self.log.info(
+            "shard {}/{}: {} of {} files".format(
+                self.index, self.count, len(selected), len(module.files)
+            )
+        )
+        return Status(
+            True,
+            "shard_complete",
+            {
+                "project_name": project.name,
+                "full_path": project.full_path,
+                "shard": "{}/{}".format(self.index, self.count),
+                "shard_files": len(selected),
+                "output": output,
+            },
+            project.metrics,
+        )
+
+
+def load_shards(paths: List[str]) -> Dict[str, FileResult]:
+    results: Dict[str, FileResult] = dict()
+    for path in paths:
+        with open(path, "rb") as shard_file:
+            for result in loads_binary(shard_file.read()):
+                results[result.full_path] = result
+    return results
+
+
+def merge_shards(project: Project, paths: List[str]) -> Status:
+    """
+    Render the project from shard results. The module is discovered again
+    so files are exported in the same order as a single run would. Files
+    missing from the shards, or changed since they were processed, are
+    processed here.
+    """
+    log = logging.getLogger("cxmeta")
+    results = load_shards(paths)
+    shard = Shard(project, 0, 1)
+    module = project.discover_module()
+    pending = list()
+    for combiner in module.files:
+        relative = relative_key(project, combiner)
+        result = results.get(relative)
+        if result is not None and result.key == shard.key(combiner):
+            combiner.load(result.chunks)
+        else:
+            log.warning("{} not in the shards, processing".format(relative))
+            pending.append(combiner)
+    project.process_files(pending)
+    return project.status(
+        project.export(module),
+        shard_files=len(module.files) - len(pending),
+        local_files=len(pending),
+    )
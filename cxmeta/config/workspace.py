@@ -0,0 +1,137 @@
+import os
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from cxmeta.config.project import Project, Status
+from cxmeta.pipeline.combiner import Combiner
+from cxmeta.pipeline.source_module import Module
+
+Stamp = Optional[Tuple[int, int]]
+
+
+def get_stamp(path) -> Stamp:
+    """Modification time and size of path, None when it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class Workspace(object):
+    """
+    Keeps the module of a project and the chunks of every source resident
+    between updates, so only the sources changed since the last update are
+    processed and exported again.
+
+    Changes are found by polling the modification time and size of every
+    source. The directories that were walked are polled as well, a changed
+    directory means sources were added or removed and discovery runs again.
+
+    Without write_outputs the sources are kept up to date but nothing is
+    exported, the outputs are rendered in memory by the caller.
+    """
+
+    def __init__(self, project: Project, write_outputs=True):
+        self.project = project
+        self.write_outputs = write_outputs
+        self.module: Optional[Module] = None
+        self.files: Dict[str, Stamp] = dict()
+        self.directories: Dict[str, Stamp] = dict()
+
+    def record(self):
+        self.files = {
+            combiner.source.full_path: get_stamp(combiner.source.full_path)
+            for combiner in self.module.files
+        }
+        watched = list(self.module.directories)
+        file_list = self.project.config.get("file_list")
+        if file_list:
+            watched.append(file_list)
+        self.directories = {path: get_stamp(path) for path in watched}
+
+    def load(self) -> Status:
+        """Process and export the whole project"""
+        self.module = self.project.load_module()
+        exports = self.export(self.module)
+        # Outputs may be written next to the sources, record afterwards so
+        # writing them does not look like a change
+        self.record()
+        return self.project.status(exports)
+
+    def export(self, module: Module, changed=None):
+        if not self.write_outputs:
+            return None
+        return self.project.export(module, changed)
+
+    def changed_files(self) -> Set[str]:
+        return {
+            path
+            for path, stamp in self.files.items()
+            if get_stamp(path) != stamp
+        }
+
+    def needs_discovery(self) -> bool:
+        return any(
+            get_stamp(path) != stamp
+            for path, stamp in self.directories.items()
+        )
+
+    def update(self) -> Optional[Status]:
+        """
+        Process and export the sources that changed since the last update,
+        returns None when nothing changed
+        """
+        if self.module is None:
+            return self.load()
+
+        project = self.project
+        changed = self.changed_files()
+        if self.needs_discovery():
+            module = Module(project, project.input_source())
+            with project.stage("discover"):
+                module.discover()
+            previous = {
+                combiner.source.full_path: combiner
+                for combiner in self.module.files
+            }
+            current = {combiner.source.full_path for combiner in module.files}
+            # Added and removed sources change the outputs as well
+            changed.update(current.symmetric_difference(previous))
+            for i, combiner in enumerate(module.files):
+                path = combiner.source.full_path
+                if path in previous and path not in changed:
+                    module.files[i] = previous[path]
+        elif changed:
+            module = self.module
+            for i, combiner in enumerate(module.files):
+                if combiner.source.full_path in changed:
+                    # Combiners keep parsing state, start from a fresh one
+                    module.files[i] = Combiner(
+                        project, combiner.module, combiner.source
+                    )
+        else:
+            return None
+
+        pending = [
+            combiner
+            for combiner in module.files
+            if combiner.source.full_path in changed
+        ]
+        project.process_files(pending)
+        self.module = module
+        exports = self.export(module, changed)
+        self.record()
+        return project.status(exports, changed_files=len(changed))
+
+    def watch(self, interval: float, callback):
+        """
+        Poll for changes every interval seconds, calling callback with the
+        status of every update, until interrupted
+        """
+        callback(self.load())
+        while True:
+            time.sleep(interval)
+            status = self.update()
+            if status is not None:
+                callback(status)
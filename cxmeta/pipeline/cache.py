@@ -0,0 +1,111 @@
+import os
+import json
+import hashlib
+import tempfile
+from typing import Dict, List, Optional
+
+from cxmeta import __version__
+from cxmeta.pipeline.cxx_scanner import DEFAULT_READ_MODE, DEFAULT_TOKENIZER
+from cxmeta.pipeline.stream import Chunk
+from cxmeta.pipeline.serialize import FileResult, dumps_binary, loads_binary
+
+CACHE_DIRECTORY = ".cxmeta-cache"
+# Part of every cache key, bump it whenever the parser or the chunks it
+# produces change so entries written by an older version are missed
+CACHE_FORMAT = 2
+
+# The settings that change the chunks produced for a file, by their
+# defaults. Any other setting only changes how files are found, scheduled,
+# reported or rendered.
+PARSE_SETTINGS = {
+    "tokenizer": DEFAULT_TOKENIZER,
+    "read_mode": DEFAULT_READ_MODE,
+}
+
+
+def config_fingerprint(config) -> str:
+    """
+    Hash of the cxmeta version, CACHE_FORMAT and the settings that
+    influence parsing, chunks are only reused under the same fingerprint
+    """
+    settings = {
+        name: config.get(name, default)
+        for name, default in PARSE_SETTINGS.items()
+    }
+    settings["version"] = __version__
+    settings["format"] = CACHE_FORMAT
+    text = json.dumps(settings, sort_keys=True, default=str)
+    return hashlib.sha1(text.encode("utf8")).hexdigest()
+
+
+def shared_cache_path() -> str:
+    """Cache shared by the projects of a batch when none is configured"""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "cxmeta")
+
+
+def get_cache_path(project) -> str:
+    cache_path = project.config.get("cache_path")
+    if cache_path:
+        return cache_path
+    return os.path.join(project.output_path, CACHE_DIRECTORY)
+
+
+class ParseCache(object):
+    """
+    Persistent cache of combiner results.
+
+    Each source file has one entry on disk, in the binary chunk format,
+    holding the chunks and the key they were produced under. The key
+    combines the content hash of the file, the parse settings, the cxmeta
+    version and CACHE_FORMAT so any change to one of them is a miss.
+    """
+
+    def __init__(self, path, config):
+        self.path = path
+        self.fingerprint = config_fingerprint(config)
+        self.keys: Dict[str, str] = dict()
+        self.hits = 0
+        self.misses = 0
+
+    def entry_path(self, full_path: str) -> str:
+        name = hashlib.sha1(os.path.abspath(full_path).encode("utf8"))
+        return os.path.join(self.path, name.hexdigest() + ".chunks")
+
+    def key(self, source) -> str:
+        return ":".join([self.fingerprint, source.digest()])
+
+    def get(self, source) -> Optional[List[Chunk]]:
+        key = self.key(source)
+        self.keys[source.full_path] = key
+        try:
+            with open(self.entry_path(source.full_path), "rb") as entry:
+                (result,) = loads_binary(entry.read())
+        except (OSError, ValueError):
+            result = None
+        if result is None or result.key != key:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result.chunks
+
+    def put(self, source, chunks: List[Chunk]):
+        key = self.keys.pop(source.full_path, None) or self.key(source)
+        os.makedirs(self.path, exist_ok=True)
+        # Write to a temporary file first so concurrent runs never
+        # observe a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as entry:
+                entry.write(
+                    dumps_binary([FileResult(source.full_path, chunks, key)])
+                )
+            os.replace(temp_path, self.entry_path(source.full_path))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def props(self):
+        return {"cache_hits": self.hits, "cache_misses": self.misses}
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-import re
+import time
 import logging
 import os
+from typing import List, Optional
 
 from .cxx_processor import (
     CxxProcessor,
@@ -10,13 +11,13 @@ from .cxx_processor import (
     is_cxx_type,
     tokenize_cxx_identifiers,
 )
+from .cxx_scanner import DEFAULT_TOKENIZER, get_read_mode, get_tokenizer_type
+from .metrics import FileMetrics
 from .stream import Stream, Chunk, InputFile, Processor, Atom
 
 
-RST_DIRECTIVE_REGEXP = re.compile(r"\.\.(?P<name>\w+)::\s+?(?P<value>\w+)")
-
-
-WHITESPACE_REGEXP = re.compile(r"^\s+?")
+# Columns between tab stops in documentation
+TAB_SIZE = 4
 
 
 def full_to_relative(module, source_full_path):
@@ -32,6 +33,10 @@ class ChunkBuilder(object):
         self.left_justified_spaces = 0
         self.left_justified_pos = 0
         self.directives = dict()
+        # The directive whose options and content are being read
+        self.directive = None
+        self.directive_indent = 0
+        self.directive_content_indent = None
         self.docs = list()
         self.code = list()
         self.macros = list()
@@ -53,16 +58,45 @@ class ChunkBuilder(object):
     def has_code(self):
         return len(self.code) > 0
 
-    def parse_rst_directive(self, value):
-        match = RST_DIRECTIVE_REGEXP.match(value)
-        if match is None:
+    def parse_rst_directive(self, stripped, indent):
+        """
+        Start a directive from a line beginning with "..". The directive is
+        stored by name with its arguments, options and content, for example
+        ".. image:: a.png" followed by the indented option ":width: 20"
+        gives {"image": {"arguments": ["a.png"], "options": {"width": "20"},
+        "content": []}}. Comments and link targets are not directives.
+        """
+        name, separator, arguments = stripped[2:].partition("::")
+        name = name.strip()
+        if not separator or not name or " " in name:
+            self.directive = None
+            return
+        self.directive = {
+            "arguments": arguments.split(),
+            "options": dict(),
+            "content": list(),
+        }
+        self.directives[name] = self.directive
+        self.directive_indent = indent
+        self.directive_content_indent = None
+
+    def parse_directive_body(self, value, stripped, indent):
+        """Add an option or content line indented under the directive"""
+        if not stripped:
+            return
+        if indent <= self.directive_indent:
+            self.directive = None
             return
-        name = match.group("name")
-        value = match.group("value")
-        assert match is not None
-        assert name is not None
-        assert value is not None
-        self.directives[name] = value
+        content = self.directive["content"]
+        # Options come before the content
+        if not content and stripped.startswith(":"):
+            name, separator, option = stripped[1:].partition(":")
+            if separator and name:
+                self.directive["options"][name] = option.strip()
+                return
+        if self.directive_content_indent is None:
+            self.directive_content_indent = indent
+        content.append(value[min(indent, self.directive_content_indent) :])
 
     def parse_cxx_decls(self, value, in_expr_group):
         """Convert the statement text into types and names"""
@@ -74,25 +108,30 @@ class ChunkBuilder(object):
                 # Capture name outside of parameter lists
                 self.names.append(token)
 
-    def add_doc(self, atom: Atom):
-        value = atom.data[r"value"]
-        # Convert tabs to spaces
-        value.replace("\t", "    ")
+    def add_doc(self, atom: Atom, column: int):
+        """Add the doc text of atom, which starts at column of its line"""
+        value = atom.value
+        if "\t" in value:
+            # Tab stops are columns of the source line, not of the doc text
+            padding = " " * column
+            value = (padding + value).expandtabs(TAB_SIZE)[column:]
+        stripped = value.lstrip()
+        leading_spaces = len(value) - len(stripped)
 
         # Do one time setup of docs section
         if not self.line_num:
             self.line_num = atom.line_num
-            self.left_justified_spaces = len(value) - len(value.lstrip())
+            self.left_justified_spaces = leading_spaces
             self.left_justified_pos = atom.pos
 
-        # Process rST directives
-        stripped_value = value.lstrip()
-        if stripped_value.startswith(".."):
-            self.parse_rst_directive(stripped_value)
+        # Process rST directives along with their options and content
+        if stripped.startswith(".."):
+            self.parse_rst_directive(stripped, leading_spaces)
+        elif self.directive is not None:
+            self.parse_directive_body(value, stripped, leading_spaces)
 
         # Remove leading whitespace of doc lines that are left aligned
         # with the original documentation line
-        leading_spaces = len(value) - len(value.lstrip())
         should_justify = (
             atom.pos == self.left_justified_pos
             and leading_spaces >= self.left_justified_spaces
@@ -147,17 +186,32 @@ class Combiner(Processor):
     def __init__(self, project, module, source):
         Processor.__init__(self, project, source, InputFile, Chunk)
         self.log = logging.getLogger("cxmeta")
-        self.proc = CxxProcessor(project, module, source)
+        self.module = module
+        tokenizer = project.config.get("tokenizer", DEFAULT_TOKENIZER)
+        processor_type = get_tokenizer_type(tokenizer)
+        if processor_type is None:
+            raise ValueError(
+                "Tokenizer '{}' not supported.".format(tokenizer)
+            )
+        get_read_mode(project.config, tokenizer)
+        self.proc = processor_type(project, module, source)
         self.stream_data = Stream(source)
         self.state = Combiner.STATE_NONE
         self.builder = ChunkBuilder()
+        self.finished: List[Chunk] = list()
         self.in_comment = False
         self.last_doc_comment_line = 0
         self.last_stmt_line = 0
+        # Atoms with tabs seen on the current line, to find the columns of
+        # the atoms that follow them
+        self.tab_line = 0
+        self.tab_atoms: List[Atom] = list()
         self.in_expr_group = False
         self.newline = "\n"
         self.block_level = 0
         self.debug_chunks = project.config.get("debug_chunks", False)
+        self.instrument = project.config.get("metrics", False)
+        self.metrics: Optional[FileMetrics] = None
         self.project_relative_path = full_to_relative(module, source.full_path)
 
     def __str__(self):
@@ -166,8 +220,22 @@ class Combiner(Processor):
         )
 
     def process(self) -> Combiner:
-        self.proc.process()
-        self.combine()
+        if not self.instrument:
+            self.combine()
+            return self
+
+        metrics = FileMetrics(self.source.full_path)
+        start = time.perf_counter()
+        self.combine(metrics.count_atoms(self.proc.read()))
+        metrics.seconds = time.perf_counter() - start
+        metrics.lines = self.proc.line_num
+        metrics.chunks = len(self.stream_data.content)
+        self.metrics = metrics
+        return self
+
+    def load(self, chunks) -> Combiner:
+        """Use chunks that were produced by another combiner instance"""
+        self.stream_data.content = list(chunks)
         return self
 
     def _change_state(self, new_state):
@@ -180,7 +248,7 @@ class Combiner(Processor):
         if chunk is not None:
             if self.debug_chunks:
                 print("[_finish_chunk]: {}".format(chunk))
-            self.stream_data.append(chunk)
+            self.finished.append(chunk)
         self.builder = ChunkBuilder()
         self._change_state(Combiner.STATE_NONE)
 
@@ -209,10 +277,31 @@ class Combiner(Processor):
 
     def _comment_token(self, atom: Atom):
         if self.state == Combiner.STATE_CODE:
-            self.builder.add_code(atom.data[r"value"])
+            self.builder.add_code(atom.value)
+        if "\t" in atom.value:
+            self._add_tab_atom(atom)
+
+    def _add_tab_atom(self, atom: Atom):
+        if atom.line_num != self.tab_line:
+            self.tab_line = atom.line_num
+            self.tab_atoms.clear()
+        self.tab_atoms.append(atom)
+
+    def _column(self, atom: Atom) -> int:
+        """Column of atom in its source line once tabs are expanded"""
+        if atom.line_num != self.tab_line:
+            return atom.pos
+        column = 0
+        pos = 0
+        for tab_atom in self.tab_atoms:
+            column += tab_atom.pos - pos
+            text = (" " * column + tab_atom.value).expandtabs(TAB_SIZE)
+            column = len(text)
+            pos = tab_atom.pos + len(tab_atom.value)
+        return column + atom.pos - pos
 
     def _content_handler(self, atom: Atom):
-        value = atom.data[r"value"]
+        value = atom.value
         if self.state == Combiner.STATE_DOCS:
             # Content occurring right after documentation will be included
             # as code. Note that if the current line was "documentation"
@@ -220,16 +309,18 @@ class Combiner(Processor):
             if self.last_doc_comment_line == (atom.line_num - 1):
                 self._change_state(Combiner.STATE_CODE)
             else:
-                self.builder.add_doc(atom)
+                self.builder.add_doc(atom, self._column(atom))
 
         if self.state == Combiner.STATE_CODE:
             # Parse statement data on line start into types
             if self.block_level == 0:
                 self.builder.parse_cxx_decls(value, self.in_expr_group)
             self.builder.add_code(value)
+        if "\t" in value:
+            self._add_tab_atom(atom)
 
     def _default_handler(self, atom: Atom):
-        if type(atom.data) is dict and atom.data.get(r"value") is not None:
+        if atom.value is not None:
             self._content_handler(atom)
 
     def _newline_handler(self, atom: Atom):
@@ -248,7 +339,7 @@ class Combiner(Processor):
 
     def _macro_handler(self, atom):
         self.builder.types.append(r"macro")
-        self.builder.macros.append(atom.data.get(r"value"))
+        self.builder.macros.append(atom.value)
         # Pass macro data through as content to drive the
         # general content state machine
         self._content_handler(atom)
@@ -261,27 +352,42 @@ class Combiner(Processor):
         if not self.builder.is_macro() and not self.builder.is_function():
             self.builder.types.append(r"function")
 
-    def combine(self):
-        handlers = {
-            CxxProcessor.CONTENT: self._content_handler,
-            CxxProcessor.COMMENT_START: self._comment_start,
-            CxxProcessor.COMMENT_END: self._comment_end,
-            CxxProcessor.COMMENT_TOKEN: self._comment_token,
-            CxxProcessor.BLOCK_START: self._block_start_handler,
-            CxxProcessor.BLOCK_END: self._block_end_handler,
-            CxxProcessor.STMT_END: self._statement_end_handler,
-            CxxProcessor.NEWLINE: self._newline_handler,
-            CxxProcessor.MACRO: self._macro_handler,
-            CxxProcessor.EXPR_GROUP_START: self._expr_group_start,
-            CxxProcessor.EXPR_GROUP_END: self._expr_group_end,
-        }
+    def combine(self, atoms=None):
+        for chunk in self.read(atoms):
+            self.stream_data.append(chunk)
+
+    def read(self, atoms=None):
+        """
+        Generate chunks as soon as they are complete, consuming atoms while
+        the source is being tokenized
+        """
+        # Handlers indexed by the atom kind code
+        handlers = [self._default_handler] * len(CxxProcessor.MARKER_NAMES)
+        handlers[CxxProcessor.CONTENT] = self._content_handler
+        handlers[CxxProcessor.COMMENT_START] = self._comment_start
+        handlers[CxxProcessor.COMMENT_END] = self._comment_end
+        handlers[CxxProcessor.COMMENT_TOKEN] = self._comment_token
+        handlers[CxxProcessor.BLOCK_START] = self._block_start_handler
+        handlers[CxxProcessor.BLOCK_END] = self._block_end_handler
+        handlers[CxxProcessor.STMT_END] = self._statement_end_handler
+        handlers[CxxProcessor.NEWLINE] = self._newline_handler
+        handlers[CxxProcessor.MACRO] = self._macro_handler
+        handlers[CxxProcessor.EXPR_GROUP_START] = self._expr_group_start
+        handlers[CxxProcessor.EXPR_GROUP_END] = self._expr_group_end
         self.builder = ChunkBuilder()
-        for atom in self.proc.stream().read():
+        finished = self.finished
+        if atoms is None:
+            atoms = self.proc.read()
+        for atom in atoms:
             if self.debug_chunks:
                 print("input atom: {}".format(atom))
-            handler = handlers.get(atom.data[r"type"]) or self._default_handler
-            handler(atom)
+            handlers[atom.kind](atom)
+            if finished:
+                yield from finished
+                finished.clear()
         self._finish_chunk()
+        yield from finished
+        finished.clear()
 
     def stream(self):
         return self.stream_data
@@ -1,4 +1,5 @@
 import re
+from typing import List, Optional
 
 from cxmeta.pipeline.stream import (
     Stream,
@@ -51,33 +52,51 @@ class CxxProcessor(Processor):
     """
     cxx_processor.Processors emits atoms into the stream with the following
     structure:
-        <line, pos, data: { type:, content: }>
-        type - one of the stream markers listed at the top of this file
-        content - the content of the processed content from the file
+        <line, pos, kind, value>
+        kind - one of the stream marker codes listed below
+        value - the content of the processed content from the file, None
+                for pure markers
 
     Note that newlines are treated as an event and not content.
 
     """
 
-    # Stream markers
-    BLOCK_START = r"block_start"
-    BLOCK_END = r"block_end"
-    STMT_END = r"stmt_end"
-    EXPR_GROUP_START = r"expr_group_start"
-    EXPR_GROUP_END = r"expr_group_end"
-    MACRO = r"macro"
-    LINE_CONT = r"line_cont"
-    CONTENT = r"content"
-    NEWLINE = r"newline"
-    COMMENT_START = r"comment_start"
-    COMMENT_END = r"comment_end"
-    COMMENT_TOKEN = r"comment_token"
+    # Stream markers, small integer codes so handlers can be dispatched
+    # by index
+    BLOCK_START = 0
+    BLOCK_END = 1
+    STMT_END = 2
+    EXPR_GROUP_START = 3
+    EXPR_GROUP_END = 4
+    MACRO = 5
+    LINE_CONT = 6
+    CONTENT = 7
+    NEWLINE = 8
+    COMMENT_START = 9
+    COMMENT_END = 10
+    COMMENT_TOKEN = 11
+
+    MARKER_NAMES = (
+        r"block_start",
+        r"block_end",
+        r"stmt_end",
+        r"expr_group_start",
+        r"expr_group_end",
+        r"macro",
+        r"line_cont",
+        r"content",
+        r"newline",
+        r"comment_start",
+        r"comment_end",
+        r"comment_token",
+    )
 
     def __init__(self, project, modules, source):
         Processor.__init__(self, project, source, InputFile, Chunk)
         self.match = TOKEN_REGEXP
         self.in_decl: bool = False
         self.stream_data = Stream(self.source)
+        self.pending: List[Atom] = list()
         self.in_ml_comment = False
         self.in_comment = False
         self.line_num: int = 0
@@ -88,9 +107,19 @@ class CxxProcessor(Processor):
         return self.stream_data
 
     def process(self):
+        for atom in self.read():
+            self.stream_data.append(atom)
+        return self
+
+    def read(self):
+        """
+        Generate atoms lazily, one source line at a time, so that only the
+        atoms of the current line are held in memory
+        """
         for line in self.source.read():
             self.each_line(line)
-        return self
+            yield from self.pending
+            self.pending.clear()
 
     def each_line(self, line: Line):
         matches = []
@@ -184,31 +213,31 @@ class CxxProcessor(Processor):
         else:
             self.emit_content(pos, line[pos : match.end()])
 
-    def emit(self, pos: int, **kwargs):
-        is_comment = self.in_ml_comment | self.in_comment
+    def emit(self, pos: int, kind: int, value: Optional[str] = None):
         if self.debug_atoms:
+            is_comment = self.in_ml_comment | self.in_comment
             print(
                 '[{}] [{}:{}#{}] "{}" comment?: {}'.format(
-                    kwargs["type"],
+                    CxxProcessor.MARKER_NAMES[kind],
                     self.stream_data.name,
                     self.line_num,
                     pos,
-                    kwargs.get(r"value", r""),
+                    value or r"",
                     is_comment,
                 )
             )
-        self.stream_data.append(Atom(self.line_num, pos, kwargs))
+        self.pending.append(Atom(self.line_num, pos, kind, value))
 
     def emit_content(self, pos: int, value: str):
         if len(value) == 0:
             return
-        self.emit(pos, type=CxxProcessor.CONTENT, value=value)
+        self.emit(pos, CxxProcessor.CONTENT, value)
 
     def emit_macro(self, pos: int, value: str):
-        self.emit(pos, type=CxxProcessor.MACRO, value=value)
+        self.emit(pos, CxxProcessor.MACRO, value)
 
     def emit_comment_token(self, pos: int, value: str):
-        self.emit(pos, type=CxxProcessor.COMMENT_TOKEN, value=value)
+        self.emit(pos, CxxProcessor.COMMENT_TOKEN, value)
 
-    def emit_marker(self, pos: int, marker: str):
-        self.emit(pos, type=marker)
+    def emit_marker(self, pos: int, marker: int):
+        self.emit(pos, marker)
@@ -0,0 +1,224 @@
+import re
+from typing import Mapping, Optional, Type, Union
+
+from cxmeta.pipeline.cxx_processor import CxxProcessor
+
+# The tokens of cxx_processor.TOKEN_REGEXP, in the same order, with one
+# group per token so a match can be dispatched on its group index
+SCAN_REGEXP = re.compile(
+    r"(\()|(\))|(\{)|(\})|(^#.*$)|(\\$)|(\;)"
+    r"|(\/{2,})|(/\*{2,}/)|(/\*{1,})|(\*{1,}/)",
+    re.MULTILINE,
+)
+
+# The same expression for bytes buffers, where a carriage return may still
+# precede the newline
+SCAN_BYTES_REGEXP = re.compile(
+    rb"(\()|(\))|(\{)|(\})|(^#[^\r\n]*)|(\\(?=\r?$))|(\;)"
+    rb"|(\/{2,})|(/\*{2,}/)|(/\*{1,})|(\*{1,}/)",
+    re.MULTILINE,
+)
+
+ENCODING = "utf8"
+
+READ_MODES = ("text", "bytes", "mmap")
+
+DEFAULT_READ_MODE = "text"
+
+# Group indexes of SCAN_REGEXP
+EXPR_GROUP_START = 1
+EXPR_GROUP_END = 2
+BLOCK_START = 3
+BLOCK_END = 4
+MACRO = 5
+LINE_CONT = 6
+STMT_END = 7
+LINE_COMMENT = 8
+EMPTY_COMMENT = 9
+COMMENT_START = 10
+COMMENT_END = 11
+
+# Markers, indexed by group, for tokens that are captured along with the
+# content preceding them when they occur in a statement
+CAPTURED_MARKERS = (
+    None,
+    CxxProcessor.EXPR_GROUP_START,
+    CxxProcessor.EXPR_GROUP_END,
+    CxxProcessor.BLOCK_START,
+    CxxProcessor.BLOCK_END,
+    None,
+    None,
+    CxxProcessor.STMT_END,
+    None,
+    None,
+    None,
+    None,
+)
+
+
+class CxxScanner(CxxProcessor):
+    """
+    Single pass tokenizer producing the same atoms as CxxProcessor.
+
+    Instead of searching every line separately the whole source is
+    scanned with one finditer() and line numbers are derived from the
+    newline offsets. Atom positions remain relative to the start of their
+    line.
+
+    The source is either read as text or, depending on the read_mode
+    setting, as a bytes buffer or a memory map. Bytes are only decoded for
+    the slices that become atom values.
+    """
+
+    def __init__(self, project, modules, source):
+        CxxProcessor.__init__(self, project, modules, source)
+        self.read_mode = get_read_mode(project.config, "buffer")
+        self.buffer: Union[str, bytes] = ""
+        self.line_start = 0
+        self.line_ascii = True
+
+    def read(self):
+        if self.read_mode == "text":
+            yield from self.scan(self.source.read_text())
+        else:
+            use_mmap = self.read_mode == "mmap"
+            with self.source.open_buffer(use_mmap) as buffer:
+                yield from self.scan(buffer)
+
+    def col(self, offset: int) -> int:
+        """Character position of a buffer offset within the current line"""
+        if self.line_ascii:
+            return offset - self.line_start
+        line_prefix = self.buffer[self.line_start : offset]
+        return len(line_prefix.decode(ENCODING, "replace"))
+
+    def value(self, start: int, end: int) -> str:
+        value = self.buffer[start:end]
+        if type(value) is str:
+            return value
+        return value.decode(ENCODING, "replace")
+
+    def scan(self, buffer):
+        is_text = type(buffer) is str
+        regexp = SCAN_REGEXP if is_text else SCAN_BYTES_REGEXP
+        newline = "\n" if is_text else b"\n"
+        self.buffer = buffer
+        size = len(buffer)
+        matches = regexp.finditer(buffer)
+        match = next(matches, None)
+        line_start = 0
+        line_num = 0
+        while line_start < size:
+            line_end = buffer.find(newline, line_start)
+            if line_end < 0:
+                line_end = size
+            content_end = line_end
+            if not is_text:
+                # text mode translates newlines, bytes have to be trimmed
+                if buffer[line_end - 1 : line_end] == b"\r":
+                    content_end = max(line_start, line_end - 1)
+                self.line_ascii = buffer[line_start:line_end].isascii()
+            line_num += 1
+            self.line_num = line_num
+            self.line_start = line_start
+
+            pos = line_start
+            while match is not None and match.start() < line_end:
+                in_comment = self.in_comment | self.in_ml_comment
+                if self.debug_matches:
+                    print(
+                        "match: '{}', comment?: {}".format(
+                            match.group(), in_comment
+                        )
+                    )
+                start, end = match.span()
+                marker = CAPTURED_MARKERS[match.lastindex]
+                if in_comment:
+                    self.scan_in_comment(pos, match)
+                elif marker is not None:
+                    self.emit_content(self.col(pos), self.value(pos, end))
+                    self.emit_marker(self.col(start), marker)
+                else:
+                    self.scan_in_statement(pos, match)
+                pos = end
+                match = next(matches, None)
+
+            # write the remainder of the line if any
+            self.emit_content(self.col(pos), self.value(pos, content_end))
+            self.emit_marker(self.col(content_end), CxxProcessor.NEWLINE)
+
+            # line level comments always end when the line is finished
+            if self.in_comment and not self.in_ml_comment:
+                self.in_comment = False
+                self.emit_marker(
+                    self.col(content_end), CxxProcessor.COMMENT_END
+                )
+
+            yield from self.pending
+            self.pending.clear()
+            line_start = line_end + 1
+
+    def scan_in_statement(self, pos, match):
+        group = match.lastindex
+        start, end = match.span()
+        if group == COMMENT_START or group == EMPTY_COMMENT:
+            self.emit_content(self.col(pos), self.value(pos, start))
+            self.in_ml_comment = True
+            self.emit_marker(self.col(start), CxxProcessor.COMMENT_START)
+            self.emit_comment_token(self.col(start), self.value(start, end))
+            # special case for /**/
+            if group == EMPTY_COMMENT:
+                self.in_ml_comment = False
+                self.emit_marker(self.col(end), CxxProcessor.COMMENT_END)
+        elif group == LINE_COMMENT:
+            self.emit_content(self.col(pos), self.value(pos, start))
+            self.in_comment = True
+            self.emit_marker(self.col(start), CxxProcessor.COMMENT_START)
+            self.emit_comment_token(self.col(start), self.value(start, end))
+        elif group == MACRO:
+            self.emit_macro(self.col(pos), self.value(start, end))
+
+    def scan_in_comment(self, pos, match):
+        group = match.lastindex
+        start, end = match.span()
+        if (
+            group == COMMENT_END
+            or group == EMPTY_COMMENT
+            or (group == MACRO and self.value(start, end).endswith(r"*/"))
+        ):
+            self.emit_content(self.col(pos), self.value(pos, start))
+            self.emit_comment_token(self.col(start), self.value(start, end))
+            self.in_ml_comment = False
+            self.emit_marker(self.col(start), CxxProcessor.COMMENT_END)
+        elif group == MACRO and end - start == 1:  # only a bare '#'
+            self.emit_content(self.col(pos), self.value(pos, end))
+            self.emit_marker(self.col(start), CxxProcessor.MACRO)
+        else:
+            self.emit_content(self.col(pos), self.value(pos, end))
+
+
+TOKENIZERS: Mapping[str, Type[CxxProcessor]] = {
+    "line": CxxProcessor,
+    "buffer": CxxScanner,
+}
+
+DEFAULT_TOKENIZER = "line"
+
+
+def get_tokenizer_type(name: str) -> Optional[Type[CxxProcessor]]:
+    return TOKENIZERS.get(name)
+
+
+def get_read_mode(config, tokenizer: str) -> str:
+    """
+    The read_mode setting, only the buffer tokenizer reads the source other
+    than as text
+    """
+    read_mode = config.get("read_mode", DEFAULT_READ_MODE)
+    if read_mode not in READ_MODES:
+        raise ValueError("Read mode '{}' not supported.".format(read_mode))
+    if read_mode != DEFAULT_READ_MODE and tokenizer != "buffer":
+        raise ValueError(
+            "Read mode '{}' requires the buffer tokenizer.".format(read_mode)
+        )
+    return read_mode
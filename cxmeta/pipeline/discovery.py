@@ -0,0 +1,89 @@
+import os
+import re
+import json
+import fnmatch
+from typing import List, Optional, Pattern
+
+from cxmeta.pipeline.stream import InputDirectory, InputFile
+
+
+def compile_globs(patterns: List[str]) -> Optional[Pattern]:
+    """Combine glob patterns into one expression, None if there are none"""
+    if not patterns:
+        return None
+    return re.compile("|".join(fnmatch.translate(p) for p in patterns))
+
+
+class PathFilter(object):
+    """
+    Decides which discovered paths are processed, based on the
+    include_extensions and exclude_paths settings. Exclude globs are matched
+    against the path relative to the project root and the base name.
+    """
+
+    def __init__(self, project):
+        self.root = os.path.abspath(project.full_path)
+        if not os.path.isdir(self.root):
+            self.root = os.path.dirname(self.root)
+        self.include_extensions = set(
+            project.config.get("include_extensions", list())
+        )
+        self.exclude = compile_globs(project.config.get("exclude_paths"))
+
+    def relative_path(self, full_path: str) -> str:
+        relative = os.path.relpath(os.path.abspath(full_path), self.root)
+        return relative.replace(os.sep, "/")
+
+    def is_excluded(self, full_path: str) -> bool:
+        if self.exclude is None:
+            return False
+        return (
+            self.exclude.match(os.path.basename(full_path)) is not None
+            or self.exclude.match(self.relative_path(full_path)) is not None
+        )
+
+    def is_included_file(self, full_path: str) -> bool:
+        _, ext = os.path.splitext(full_path)
+        return ext in self.include_extensions
+
+
+def load_file_list(path: str) -> List[str]:
+    """
+    Read a precomputed list of source files.
+
+    Either a compile_commands.json style manifest or a text file with one
+    path per line, blank lines and lines starting with # are ignored.
+    Relative paths are resolved against the manifest location.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    paths = list()
+    with open(path, "r") as manifest:
+        if path.endswith(".json"):
+            for entry in json.load(manifest):
+                directory = os.path.join(base, entry.get("directory", ""))
+                paths.append(os.path.join(directory, entry["file"]))
+        else:
+            for line in manifest:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    paths.append(os.path.join(base, line))
+
+    # Remove duplicates while keeping the manifest order
+    unique = dict()
+    for full_path in paths:
+        unique.setdefault(os.path.normpath(full_path), None)
+    return list(unique)
+
+
+class InputManifest(InputDirectory):
+    """
+    A directory whose files are listed up front instead of being walked
+    """
+
+    def __init__(self, full_path, file_paths: List[str]):
+        InputDirectory.__init__(self, full_path)
+        self.file_paths = file_paths
+
+    def read(self):
+        for full_path in self.file_paths:
+            yield InputFile(full_path, False)
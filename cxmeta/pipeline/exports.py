@@ -0,0 +1,119 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from cxmeta.pipeline.gfm_exporter import GfmExporter
+
+# Settings an entry of the exports list can set, the others are shared by
+# every export of the project
+EXPORT_SETTINGS = {
+    "style",
+    "output_path",
+    "output_directory",
+    "output_file_name",
+    "publish_single_file",
+    "project_header",
+    "cross_reference",
+    "symbol_index",
+    "write_jobs",
+    "skip_unchanged",
+}
+
+
+def get_export_jobs(config) -> int:
+    """Number of threads rendering exports, 0 selects one per core"""
+    jobs = int(config.get("export_jobs", 1))
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    return jobs
+
+
+def export_configs(config) -> List[Optional[Dict]]:
+    """
+    The settings of every export of the project. An entry of the exports
+    list is a style name or a mapping of export settings, without exports
+    the project is exported once with its own settings.
+    """
+    exports = config.get("exports")
+    if not exports:
+        return [None]
+    configs: List[Optional[Dict]] = list()
+    for entry in exports:
+        if isinstance(entry, str):
+            entry = {"style": entry}
+        unknown = set(entry).difference(EXPORT_SETTINGS)
+        if unknown:
+            raise ValueError(
+                "Export settings not supported: {}".format(
+                    ", ".join(sorted(unknown))
+                )
+            )
+        configs.append(dict(entry))
+    return configs
+
+
+class Exports(object):
+    """
+    The exporters of a project, each renders the same parsed module so an
+    output format only costs its rendering. Exporters run one after the
+    other or, with export_jobs, on a pool of threads.
+    """
+
+    def __init__(self, project):
+        self.project = project
+        self.exporters = [
+            GfmExporter(project, config)
+            for config in export_configs(project.config)
+        ]
+        self.jobs = min(get_export_jobs(project.config), len(self.exporters))
+
+    def check_outputs(self, module):
+        outputs = dict()
+        for exporter in self.exporters:
+            paths = [exporter.output_path_for(module)]
+            if not exporter.config.get("publish_single_file"):
+                paths.extend(
+                    exporter.source_output_path_for(source_file)
+                    for source_file in module.files
+                )
+            if exporter.symbol_index_name:
+                paths.append(
+                    os.path.join(
+                        exporter.output_path, exporter.symbol_index_name
+                    )
+                )
+            # Only outputs of different exports collide
+            for path in {os.path.abspath(path) for path in paths}:
+                if path in outputs:
+                    raise ValueError(
+                        "Exports '{}' and '{}' both write {}".format(
+                            outputs[path], exporter.config.get("style"), path
+                        )
+                    )
+                outputs[path] = exporter.config.get("style")
+
+    def export_module(self, module, changed=None):
+        self.check_outputs(module)
+        if self.jobs <= 1:
+            for exporter in self.exporters:
+                exporter.export_module(module, changed)
+            return
+        # Chunks are only read while rendering, linked chunks are copies
+        with ThreadPoolExecutor(
+            max_workers=self.jobs, thread_name_prefix="cxmeta-export"
+        ) as executor:
+            futures = [
+                executor.submit(exporter.export_module, module, changed)
+                for exporter in self.exporters
+            ]
+            for future in futures:
+                future.result()
+
+    def props(self):
+        props = {
+            "outputs_written": sum(e.written for e in self.exporters),
+            "outputs_skipped": sum(e.skipped for e in self.exporters),
+        }
+        if len(self.exporters) > 1:
+            props["exports"] = len(self.exporters)
+        return props
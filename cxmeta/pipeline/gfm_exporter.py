@@ -1,91 +1,217 @@
 import sys
 import os
 import logging
+from collections import ChainMap
+from typing import Dict
 
+from cxmeta.config import get_output_path
+from cxmeta.pipeline.linker import Linker
+from cxmeta.pipeline.symbol_index import Symbol, SymbolIndex, symbol_name
+from cxmeta.pipeline.writer import OutputWriter, encoded_offsets
+from cxmeta.style.gfm_common import gfm_anchor, markdown_headings
 from cxmeta.style.registry import get_style_type
 
 
-def copy_header_to_output(header_file_path, output_file):
+def get_write_jobs(config) -> int:
+    """Number of threads writing output files, 0 selects one per core"""
+    jobs = int(config.get("write_jobs", 1))
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    return jobs
+
+
+def copy_header_to_output(header_file_path, output):
     copy_size = 8192
     with open(header_file_path, "r") as input_file:
-        byte_data = input_file.read(copy_size)
-        output_file.write(byte_data)
+        output.append(input_file.read(copy_size))
+
+
+class AnchorCounter(object):
+    """Anchors of the headings of each output, numbered like GitHub does"""
+
+    def __init__(self):
+        self.seen: Dict[str, Dict[str, int]] = dict()
+
+    def add(self, output: str, heading: str) -> str:
+        seen = self.seen.setdefault(output, dict())
+        anchor = gfm_anchor(heading)
+        count = seen.get(anchor, 0)
+        seen[anchor] = count + 1
+        if count:
+            anchor = "{}-{}".format(anchor, count)
+        return anchor
+
+    def add_text(self, output: str, text: str):
+        for heading in markdown_headings(text):
+            self.add(output, heading)
 
 
 class GfmExporter(object):
-    def __init__(self, project):
+    """
+    Renders a module in one style. The settings of the export are read from
+    config, falling back on the project config, so one parsed module can be
+    exported in several styles and places.
+    """
+
+    def __init__(self, project, config=None):
         self.log = logging.getLogger("cxmeta")
         self.project = project
         self.output = sys.stdout
-        self.debug_export = project.config.get("debug_exporter", False)
-        self.config = None
+        self.config = project.config
         self.output_path = project.output_path
+        if config:
+            self.config = ChainMap(config, project.config)
+            if "output_path" in config or "output_directory" in config:
+                # The location of the export replaces the project's
+                self.output_path = get_output_path(project.full_path, config)
+        self.debug_export = self.config.get("debug_exporter", False)
         self.output_file_path = None  # computed path to current output file
+        self.writer = None  # OutputWriter of the export in progress
+        self.source_output_path = None  # output of the current source file
+        self.symbol_index_name = self.config.get("symbol_index")
+        self.symbols = None
+        # Symbols of the output being rendered with the index of the part
+        # they start at, resolved to offsets once the output is complete
+        self.pending_symbols = list()
+        if self.symbol_index_name:
+            self.symbols = SymbolIndex()
+            self.source_root = project.full_path
+            if not os.path.isdir(self.source_root):
+                self.source_root = os.path.dirname(self.source_root)
+        self.written = 0
+        self.skipped = 0
         self.newline = project.newline
         assert self.newline is not None
-        style_name = project.config.get("style")
+        style_name = self.config.get("style")
         style_class = get_style_type(style_name)
         if style_class is None:
             raise ValueError(
                 "Exporter style '{}' not supported.".format(style_name)
             )
-        self.style = style_class()
+        self.style = style_class(project)
+        self.linker = None
+        if self.config.get("cross_reference", False):
+            self.linker = Linker()
 
-    def open_output_for(self, module):
+    def output_path_for(self, module):
         # Get the final output file for the module
-        output_file_name = self.project.config.get("output_file_name")
+        output_file_name = self.config.get("output_file_name")
         if output_file_name:
-            self.output_file_path = os.path.join(
-                self.output_path, output_file_name
-            )
-        else:
-            self.output_file_path = os.path.join(
-                self.output_path, module.name + ".md"
-            )
-        self.log.info(
-            "writing module {} to {}".format(module, self.output_file_path)
-        )
-        return open(self.output_file_path, "w+")
+            return os.path.join(self.output_path, output_file_name)
+        return os.path.join(self.output_path, module.name + ".md")
 
-    def export_module(self, module):
+    def export_module(self, module, changed=None):
+        """
+        Export the module, when changed is a set of source paths only the
+        per-file outputs of those sources are rendered again
+        """
         if self.debug_export:
             print("[export] exporting module: {}".format(module))
 
         # Create the output directories
         os.makedirs(self.output_path, exist_ok=True)
 
-        with self.open_output_for(module) as output_file:
+        # Outputs are rendered in memory as a list of parts that is joined
+        # once and handed to the writer, which replaces each file
+        # atomically, possibly from several threads
+        writer = OutputWriter(
+            get_write_jobs(self.config),
+            skip_unchanged=self.config.get("skip_unchanged", False),
+        )
+        with writer:
+            self.writer = writer
+            self.output_file_path = self.output_path_for(module)
+            self.log.info(
+                "writing module {} to {}".format(module, self.output_file_path)
+            )
+            output = list()
+            self.render_module(output, module, changed)
+            writer.submit(self.output_file_path, self.join_output(output))
+            if self.symbols is not None:
+                writer.submit(
+                    os.path.join(self.output_path, self.symbol_index_name),
+                    self.symbols.dumps(),
+                )
+        self.writer = None
+        self.written += writer.written
+        self.skipped += writer.skipped
+
+    def props(self):
+        return {
+            "outputs_written": self.written,
+            "outputs_skipped": self.skipped,
+        }
+
+    def join_output(self, output) -> str:
+        """
+        The text of the output parts, placing the pending symbols at their
+        byte offsets in the written file. The parts are consumed.
+        """
+        offsets = list()
+        offset = 0
+        i = 0
+        for _, index in self.pending_symbols:
+            while i < index:
+                offset += len(output[i])
+                i += 1
+            offsets.append(offset)
+        text = "".join(output)
+        # Free the parts before the text is encoded for writing
+        output.clear()
+        if offsets:
+            newline = self.writer.newline if self.writer else None
+            offsets = encoded_offsets(text, offsets, newline)
+            for (symbol, _), offset in zip(self.pending_symbols, offsets):
+                symbol.offset = offset
+        self.pending_symbols.clear()
+        return text
+
+    def render_module(self, output, module, changed=None):
+        if self.debug_export:
+            print(
+                "[export] exporting module to: {}".format(
+                    self.output_file_path
+                )
+            )
+
+        project_header = self.config.get("project_header")
+        if project_header:
+            header_full_path = os.path.join(
+                module.source.full_path, project_header
+            )
             if self.debug_export:
                 print(
-                    "[export] exporting module to: {}".format(
-                        self.output_file_path
+                    "[export] copying in project_header: {}".format(
+                        header_full_path
                     )
                 )
+            copy_header_to_output(header_full_path, output)
+            output.append(self.newline * 2)
 
-            project_header = self.project.config.get("project_header")
-            if project_header:
-                header_full_path = os.path.join(
-                    module.source.full_path, project_header
-                )
-                if self.debug_export:
-                    print(
-                        "[export] copying in project_header: {}".format(
-                            header_full_path
-                        )
-                    )
-                copy_header_to_output(header_full_path, output_file)
-                output_file.write(self.newline * 2)
+        if self.linker is not None:
+            self.collect_link_targets(module, "".join(output))
 
-            output_file.write(self.style.start_module(module))
+        output.append(self.style.start_module(module))
 
-            # Export each file
-            for source_file in module.files:
-                self.export_source_file(output_file, module, source_file)
+        # Export each file
+        # The symbol index needs the offsets of every source so all are
+        # rendered, the writer can still skip the unchanged outputs
+        per_file = not self.config.get("publish_single_file")
+        if self.symbols is not None:
+            changed = None
+        for source_file in module.files:
+            if (
+                per_file
+                and changed is not None
+                and source_file.source.full_path not in changed
+            ):
+                continue
+            self.export_source_file(output, module, source_file)
 
-            output_file.write(self.style.end_module(module))
+        output.append(self.style.end_module(module))
 
-    def export_source_file(self, module_output_file, module, source_file):
-        if self.project.config.get("publish_single_file"):
+    def export_source_file(self, module_output, module, source_file):
+        if self.config.get("publish_single_file"):
             if self.debug_export:
                 print(
                     "[export] exporting source file: {} to module".format(
@@ -97,36 +223,98 @@ class GfmExporter(object):
                     source_file, self.output_file_path
                 )
             )
-            self.export_source_file_inner(
-                module_output_file, module, source_file
-            )
+            self.source_output_path = self.output_file_path
+            self.export_source_file_inner(module_output, module, source_file)
         else:
             # Convert to a markdown file in the output directory
-            file_name, _ = os.path.splitext(source_file.project_relative_path)
-            file_path = os.path.join(self.output_path, file_name + ".md")
+            file_path = self.source_output_path_for(source_file)
             if self.debug_export:
                 print(
                     "[export] exporting source file: {} to file {}".format(
                         source_file, file_path
                     )
                 )
-            with open(file_path, "w+") as output_file:
-                self.log.info(
-                    "writing source {} to {}".format(source_file, file_path)
-                )
-                self.export_source_file_inner(output_file, module, source_file)
+            self.log.info(
+                "writing source {} to {}".format(source_file, file_path)
+            )
+            output = list()
+            self.source_output_path = file_path
+            self.export_source_file_inner(output, module, source_file)
+            self.writer.submit(file_path, self.join_output(output))
 
-    def export_source_file_inner(self, output_file, module, source_file):
-        output_file.write(self.style.start_source_file(module, source_file))
+    def export_source_file_inner(self, output, module, source_file):
+        output.append(self.style.start_source_file(module, source_file))
         for chunk in source_file.stream().read():
-            self.export_chunk(output_file, module, source_file, chunk)
-        output_file.write(self.style.end_source_file(module, source_file))
+            self.export_chunk(output, module, source_file, chunk)
+        output.append(self.style.end_source_file(module, source_file))
 
-    def export_chunk(self, output_file, module, source_file, chunk):
+    def export_chunk(self, output, module, source_file, chunk):
         if self.debug_export:
             print(
                 "[export] exporting chunk: {} to file: {}".format(
                     chunk, self.output_file_path
                 )
             )
-        output_file.write(self.style.chunk(module, source_file, chunk))
+        if self.symbols is not None:
+            self.add_symbol(len(output), source_file, chunk)
+        if self.linker is not None:
+            chunk = self.linker.link_chunk(
+                chunk, self.source_output_path, symbol_name(chunk)
+            )
+        self.style.render_chunk(output, module, source_file, chunk)
+
+    def source_output_path_for(self, source_file):
+        if self.config.get("publish_single_file"):
+            return self.output_file_path
+        file_name, _ = os.path.splitext(source_file.project_relative_path)
+        return os.path.join(self.output_path, file_name + ".md")
+
+    def collect_link_targets(self, module, header=""):
+        """
+        Find the output and heading anchor of every documented name before
+        anything is rendered. Duplicate headings in an output get numbered
+        anchors like GitHub does, so every heading of the output is counted
+        in the order it is rendered: the header already in the module
+        output, module and source file headings and the headings of docs as
+        well as the chunk headings.
+        """
+        anchors = AnchorCounter()
+        anchors.add_text(self.output_file_path, header)
+        anchors.add_text(
+            self.output_file_path, self.style.start_module(module)
+        )
+        for source_file in module.files:
+            output = self.source_output_path_for(source_file)
+            anchors.add_text(
+                output, self.style.start_source_file(module, source_file)
+            )
+            for chunk in source_file.stream().read():
+                self.collect_chunk_target(anchors, output, chunk)
+            anchors.add_text(
+                output, self.style.end_source_file(module, source_file)
+            )
+
+    def collect_chunk_target(self, anchors, output, chunk):
+        heading = self.style.chunk_heading(chunk)
+        if heading:
+            anchor = anchors.add(output, heading)
+            name = symbol_name(chunk)
+            if name is not None:
+                self.linker.add(name, output, anchor)
+        anchors.add_text(output, "".join(chunk.docs))
+
+    def add_symbol(self, index, source_file, chunk):
+        name = symbol_name(chunk)
+        if name is None:
+            return
+        symbol = Symbol(
+            name,
+            source_file.module.name,
+            os.path.relpath(source_file.source.full_path, self.source_root),
+            chunk.line_num,
+            chunk.types,
+            os.path.relpath(self.source_output_path, self.output_path),
+            None,
+        )
+        self.symbols.add(symbol)
+        self.pending_symbols.append((symbol, index))
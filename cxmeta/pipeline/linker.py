@@ -0,0 +1,117 @@
+import os
+import re
+import copy
+from typing import Dict, Optional, Tuple
+
+from cxmeta.pipeline.stream import Chunk
+from cxmeta.style.gfm_common import markdown_blocks
+
+# Markdown that already links or is not prose is matched as a whole so
+# identifiers inside it are left alone, every other identifier is a
+# candidate
+DOC_TOKEN_REGEXP = re.compile(
+    "|".join(
+        [
+            # Code spans
+            r"`[^`\n]*`",
+            # Link reference definitions, [ref]: url
+            r"(?m:^ {0,3}\[[^\]\n]+\]:.*)",
+            # Inline links, [text][ref] references and [ref] shortcuts
+            r"\[[^\]\n]*\](?:\([^)\n]*\)|\[[^\]\n]*\])?",
+            # Autolinks, inline HTML tags and comments
+            r"<[A-Za-z][\w+.-]*:[^\s<>]*>",
+            r"<[^\s<>@]+@[^\s<>]+>",
+            r"</?[A-Za-z][\w-]*(?:\s[^<>\n]*)?/?>",
+            r"<!--.*?-->",
+            # Bare URLs and email addresses, autolinked by GFM
+            r"\b(?:https?|ftp)://[^\s<]*",
+            r"\bwww\.[^\s<]*",
+            r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+",
+            r"(?P<name>[A-Za-z_]\w*)",
+        ]
+    )
+)
+
+
+class Linker(object):
+    """
+    Turns mentions of documented names in chunk docs into markdown links.
+    Code, the chunk's own and the code blocks of its docs, is left as it is
+    since markdown does not render links in code.
+
+    Targets are collected once per export in a dict from name to output and
+    anchor. Docs are then scanned a single time, each identifier costs one
+    dict lookup, so linking stays linear in the size of the docs however
+    many names the project declares.
+    """
+
+    def __init__(self):
+        self.targets: Dict[str, Tuple[str, str]] = dict()
+
+    def __len__(self):
+        return len(self.targets)
+
+    def add(self, name: str, output: str, anchor: str):
+        # The first declaration of a name is the one linked to
+        self.targets.setdefault(name, (output, anchor))
+
+    def link_target(self, name: str, output: str) -> Optional[str]:
+        target = self.targets.get(name)
+        if target is None:
+            return None
+        target_output, anchor = target
+        if target_output == output:
+            return "#" + anchor
+        relative = os.path.relpath(target_output, os.path.dirname(output))
+        return relative.replace(os.sep, "/") + "#" + anchor
+
+    def link_text(self, text: str, output: str, skip=None) -> str:
+        def replace(match):
+            name = match.group("name")
+            if name is None or name == skip:
+                return match.group()
+            target = self.link_target(name, output)
+            if target is None:
+                return name
+            return "[{}]({})".format(name, target)
+
+        parts = list()
+        for is_code, run in markdown_blocks(text):
+            parts.append(
+                run if is_code else DOC_TOKEN_REGEXP.sub(replace, run)
+            )
+        return "".join(parts)
+
+    def link_chunk(self, chunk: Chunk, output: str, skip=None) -> Chunk:
+        """
+        A copy of the chunk with links in its docs, the chunk itself is left
+        untouched as it may be cached or exported again
+        """
+        docs = list()
+        text = list()
+        changed = False
+
+        # Doc text can be split anywhere, link each run of text between
+        # rST directives as a whole and leave the directives as they are
+        def flush():
+            nonlocal changed
+            if text:
+                joined = "".join(text)
+                linked = self.link_text(joined, output, skip)
+                changed = changed or linked != joined
+                docs.append(linked)
+                text.clear()
+
+        for doc in chunk.docs:
+            if doc.lstrip().startswith(".."):
+                flush()
+                docs.append(doc)
+            else:
+                text.append(doc)
+        flush()
+
+        if not changed:
+            return chunk
+        linked_chunk = copy.copy(chunk)
+        linked_chunk.docs = docs
+        return linked_chunk
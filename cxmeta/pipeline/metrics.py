@@ -0,0 +1,102 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+
+class FileMetrics(object):
+    """
+    Timing and counters for one source file. Instances are produced by the
+    combiner, possibly in a worker process, so they must stay picklable.
+    """
+
+    def __init__(self, full_path, cached=False):
+        self.full_path = full_path
+        self.cached = cached
+        self.seconds = 0.0
+        self.tokenize_seconds = 0.0
+        self.lines = 0
+        self.atoms = 0
+        self.chunks = 0
+
+    def __str__(self):
+        return "[FileMetrics] <full_path: {}, seconds: {:.4f}, \
+lines: {}, atoms: {}, chunks: {}>".format(
+            self.full_path, self.seconds, self.lines, self.atoms, self.chunks
+        )
+
+    def count_atoms(self, atoms):
+        """Pass atoms through, timing how long each one took to produce"""
+        clock = time.perf_counter
+        iterator = iter(atoms)
+        while True:
+            start = clock()
+            try:
+                atom = next(iterator)
+            except StopIteration:
+                self.tokenize_seconds += clock() - start
+                return
+            self.tokenize_seconds += clock() - start
+            self.atoms += 1
+            yield atom
+
+    def to_dict(self):
+        return {
+            "full_path": self.full_path,
+            "cached": self.cached,
+            "seconds": self.seconds,
+            "tokenize_seconds": self.tokenize_seconds,
+            "lines": self.lines,
+            "atoms": self.atoms,
+            "chunks": self.chunks,
+        }
+
+
+class Metrics(object):
+    """
+    Wall time and counters of a project run, per stage and per file
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = dict()
+        self.files: List[FileMetrics] = list()
+
+    def stage_entry(self, name):
+        return self.stages.setdefault(name, {"seconds": 0.0})
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield self.stage_entry(name)
+        finally:
+            self.stage_entry(name)["seconds"] += time.perf_counter() - start
+
+    def count(self, stage, name, value):
+        entry = self.stage_entry(stage)
+        entry[name] = entry.get(name, 0) + value
+
+    def add_file(self, file_metrics: FileMetrics):
+        self.files.append(file_metrics)
+        self.count("process", "files", 1)
+        if file_metrics.cached:
+            self.count("process", "cached", 1)
+            return
+        self.count("tokenize", "seconds", file_metrics.tokenize_seconds)
+        self.count("tokenize", "files", 1)
+        self.count("tokenize", "lines", file_metrics.lines)
+        self.count("tokenize", "atoms", file_metrics.atoms)
+        self.count(
+            "combine",
+            "seconds",
+            file_metrics.seconds - file_metrics.tokenize_seconds,
+        )
+        self.count("combine", "files", 1)
+        self.count("combine", "chunks", file_metrics.chunks)
+
+    def slowest(self, count: int) -> List[FileMetrics]:
+        return sorted(self.files, key=lambda m: m.seconds, reverse=True)[
+            :count
+        ]
+
+    def props(self):
+        return {"stages": self.stages}
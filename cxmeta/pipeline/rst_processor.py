@@ -1,39 +1,194 @@
+import hashlib
+from typing import Dict, Iterable, List, Optional
+
 import docutils.nodes
 import docutils.parsers.rst
 import docutils.utils
 import docutils.frontend
 
-from cxmeta.pipeline.stream import Processor, Chunk
+from cxmeta.pipeline.stream import Chunk
+
+# Paragraph placed before every doc of a batch. A paragraph ends whatever
+# block the previous doc left open and, unlike a comment, never takes in
+# the indented lines that follow it.
+BOUNDARY = "cxmeta-doc-boundary-"
+BOUNDARY_MARKUP = "\n\n{}{}\n\n"
+BATCH_SIZE = 32
+
+
+def default_settings():
+    components = (docutils.parsers.rst.Parser,)
+    get_default_settings = getattr(
+        docutils.frontend, "get_default_settings", None
+    )
+    if get_default_settings is not None:
+        settings = get_default_settings(*components)
+    else:
+        settings = docutils.frontend.OptionParser(
+            components=components
+        ).get_default_values()
+    # Docs are rendered whatever problems rST finds in them so nothing is
+    # reported and parsing never halts
+    settings.report_level = 5
+    settings.halt_level = 5
+    settings.warning_stream = False
+    return settings
+
+
+class RstParser(object):
+    """One docutils parser and settings object shared by every parse"""
+
+    def __init__(self):
+        self.parser = docutils.parsers.rst.Parser()
+        self.settings = default_settings()
+
+    def parse(self, text: str) -> docutils.nodes.document:
+        document = docutils.utils.new_document(
+            "<rst-doc>", settings=self.settings
+        )
+        self.parser.parse(text, document)
+        return document
+
+
+RST_PARSER: Optional[RstParser] = None
+
+
+def get_rst_parser() -> RstParser:
+    """The parser shared by parse_rst and every RstProcessor"""
+    global RST_PARSER
+    if RST_PARSER is None:
+        RST_PARSER = RstParser()
+    return RST_PARSER
 
 
 # RST parsing tip by: https://stackoverflow.com/users/4973698/mbdevpl
 def parse_rst(text: str) -> docutils.nodes.document:
-    parser = docutils.parsers.rst.Parser()
-    components = (docutils.parsers.rst.Parser,)
-    settings = docutils.frontend.OptionParser(
-        components=components
-    ).get_default_values()
-    document = docutils.utils.new_document("<rst-doc>", settings=settings)
-    parser.parse(text, document)
-    return document
+    return get_rst_parser().parse(text)
+
+
+def all_nodes(document: docutils.nodes.document):
+    # findall replaced traverse in docutils 0.18
+    findall = getattr(document, "findall", None)
+    if findall is not None:
+        return findall()
+    return document.traverse()
+
+
+class ParsedDoc(object):
+    """The fields and references found in one doc"""
+
+    __slots__ = ("fields", "references")
+
+    def __init__(self):
+        self.fields: Dict[str, str] = dict()
+        self.references: List[str] = list()
+
+    def add_node(self, node: docutils.nodes.Node):
+        if isinstance(node, docutils.nodes.field):
+            self.fields[node[0].astext()] = node[1].astext()
+        elif isinstance(node, docutils.nodes.reference):
+            target = node.get("refuri") or node.get("refname")
+            if target:
+                self.references.append(target)
+
+
+class RstProcessor(object):
+    """
+    Parses the rST docs of chunks into the fields and references of each
+    doc.
+
+    Docs are parsed in batches, one document per batch with a boundary
+    paragraph before every doc, so the cost of setting up a document is
+    shared. Results are cached by the hash of the doc text, identical docs
+    and docs of files that were exported before are never parsed again.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.parser = get_rst_parser()
+        self.batch_size = batch_size
+        self.cache: Dict[bytes, ParsedDoc] = dict()
+        self.parsed = 0
+        self.cached = 0
+        self.fields = 0
+        self.references = 0
+
+    def process(self, chunks: Iterable[Chunk]) -> List[ParsedDoc]:
+        """
+        The parsed doc of every chunk in the order of chunks, chunks with
+        the same docs share one ParsedDoc that is kept in the cache
+        """
+        keys: List[Optional[bytes]] = list()
+        pending: Dict[bytes, str] = dict()
+        for chunk in chunks:
+            text = "".join(chunk.docs)
+            if not text.strip():
+                keys.append(None)
+                continue
+            key = hashlib.sha1(text.encode("utf8")).digest()
+            keys.append(key)
+            if key in self.cache:
+                self.cached += 1
+            else:
+                pending[key] = text
+
+        items = list(pending.items())
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start : start + self.batch_size]
+            results = self.parse_batch([text for _, text in batch])
+            for (key, _), parsed in zip(batch, results):
+                self.cache[key] = parsed
+                self.parsed += 1
+
+        empty = ParsedDoc()
+        docs = [empty if key is None else self.cache[key] for key in keys]
+        for doc in docs:
+            self.fields += len(doc.fields)
+            self.references += len(doc.references)
+        return docs
 
+    def parse_batch(self, texts: List[str]) -> List[ParsedDoc]:
+        if len(texts) == 1:
+            return [self.parse_doc(texts[0])]
 
-class MyVisitor(docutils.nodes.NodeVisitor):
-    def visit_reference(self, node: docutils.nodes.reference) -> None:
-        """Called for "reference" nodes."""
-        print(node)
+        markup = list()
+        for i, text in enumerate(texts):
+            markup.append(BOUNDARY_MARKUP.format(BOUNDARY, i))
+            markup.append(text)
+        document = self.parser.parse("".join(markup))
 
-    def unknown_visit(self, node: docutils.nodes.Node) -> None:
-        """Called for all other node types."""
-        pass
+        results = [ParsedDoc() for _ in texts]
+        current = None
+        expected = 0
+        for node in all_nodes(document):
+            if isinstance(node, docutils.nodes.paragraph):
+                text = node.astext()
+                if text.startswith(BOUNDARY):
+                    if text != BOUNDARY + str(expected):
+                        return self.parse_docs(texts)
+                    current = results[expected]
+                    expected += 1
+                    continue
+            if current is not None:
+                current.add_node(node)
 
+        if expected != len(texts):
+            return self.parse_docs(texts)
+        return results
 
-class RstProcessor(Processor):
-    def __init__(self, project, source):
-        Processor.__init__(self, project, source, Chunk, Chunk)
+    def parse_docs(self, texts: List[str]) -> List[ParsedDoc]:
+        # A doc hides or repeats a marker, parse every doc on its own
+        return [self.parse_doc(text) for text in texts]
 
+    def parse_doc(self, text: str) -> ParsedDoc:
+        parsed = ParsedDoc()
+        for node in all_nodes(self.parser.parse(text)):
+            parsed.add_node(node)
+        return parsed
 
-if __name__ == "__main__":
-    doc = parse_rst("spam spam lovely spam")
-    visitor = MyVisitor(doc)
-    doc.walk(visitor)
+    def props(self):
+        return {
+            "rst_parsed": self.parsed,
+            "rst_cached": self.cached,
+            "rst_fields": self.fields,
+            "rst_references": self.references,
+        }
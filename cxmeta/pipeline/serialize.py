@@ -0,0 +1,206 @@
+import json
+import struct
+from typing import IO, Iterable, List
+
+from cxmeta.pipeline.stream import Chunk
+
+MAGIC = b"CXMC"
+FORMAT_VERSION = 1
+JSONL_FORMAT = "cxmeta-chunks"
+
+HEADER = struct.Struct("<4sHI")
+RESULT = struct.Struct("<I")
+CHUNK = struct.Struct("<i")
+COUNT = struct.Struct("<I")
+
+
+class FileResult(object):
+    """
+    The chunks parsed from one source file. The key identifies what the
+    chunks were produced from, for example the content hash of the file.
+    """
+
+    __slots__ = ("full_path", "chunks", "key")
+
+    def __init__(self, full_path: str, chunks: List[Chunk], key: str = ""):
+        self.full_path = full_path
+        self.chunks = chunks
+        self.key = key
+
+    def __str__(self):
+        return "[FileResult] <full_path: {}, key: {}, chunks: {}>".format(
+            self.full_path, self.key, len(self.chunks)
+        )
+
+
+def chunk_to_dict(chunk: Chunk) -> dict:
+    return {
+        "line_num": chunk.line_num,
+        "docs": chunk.docs,
+        "code": chunk.code,
+        "types": chunk.types,
+        "names": chunk.names,
+        "directives": chunk.directives,
+    }
+
+
+def chunk_from_dict(values: dict) -> Chunk:
+    chunk = Chunk()
+    chunk.line_num = values["line_num"]
+    chunk.docs = values["docs"]
+    chunk.code = values["code"]
+    chunk.types = values["types"]
+    chunk.names = values["names"]
+    chunk.directives = values["directives"]
+    return chunk
+
+
+#
+# Binary encoding
+#
+# All integers are little endian. A string is its UTF-8 length followed by
+# the bytes, a list of strings is its length, the lengths of every string
+# and then all of the bytes so each list takes two struct calls whatever
+# its size. Directives are stored as a JSON string so their values can
+# grow without changing the format.
+#
+#   header:  magic "CXMC", u16 version, u32 result count
+#   result:  string full_path, string key, u32 chunk count, chunks
+#   chunk:   i32 line_num, docs, code, types, names, string directives
+#
+
+
+def encode_strings(values: List[str], out: List[bytes]):
+    encoded = [value.encode("utf8") for value in values]
+    out.append(
+        struct.pack("<I%dI" % len(encoded), len(encoded), *map(len, encoded))
+    )
+    out.extend(encoded)
+
+
+def encode_string(value: str, out: List[bytes]):
+    encoded = value.encode("utf8")
+    out.append(COUNT.pack(len(encoded)))
+    out.append(encoded)
+
+
+def dumps_binary(results: Iterable[FileResult]) -> bytes:
+    results = list(results)
+    out = [HEADER.pack(MAGIC, FORMAT_VERSION, len(results))]
+    for result in results:
+        encode_string(result.full_path, out)
+        encode_string(result.key, out)
+        out.append(RESULT.pack(len(result.chunks)))
+        for chunk in result.chunks:
+            out.append(CHUNK.pack(chunk.line_num))
+            encode_strings(chunk.docs, out)
+            encode_strings(chunk.code, out)
+            encode_strings(chunk.types, out)
+            encode_strings(chunk.names, out)
+            encode_string(json.dumps(chunk.directives), out)
+    return b"".join(out)
+
+
+class Decoder(object):
+    def __init__(self, data: bytes):
+        self.data = memoryview(data)
+        self.pos = 0
+
+    def unpack(self, layout: struct.Struct):
+        values = layout.unpack_from(self.data, self.pos)
+        self.pos += layout.size
+        return values
+
+    def string(self) -> str:
+        (size,) = COUNT.unpack_from(self.data, self.pos)
+        start = self.pos + COUNT.size
+        self.pos = start + size
+        return str(self.data[start : self.pos], "utf8")
+
+    def strings(self) -> List[str]:
+        (count,) = COUNT.unpack_from(self.data, self.pos)
+        self.pos += COUNT.size
+        sizes = struct.unpack_from("<%dI" % count, self.data, self.pos)
+        self.pos += 4 * count
+        values = list()
+        data = self.data
+        pos = self.pos
+        for size in sizes:
+            values.append(str(data[pos : pos + size], "utf8"))
+            pos += size
+        self.pos = pos
+        return values
+
+    def chunk(self) -> Chunk:
+        chunk = Chunk()
+        (chunk.line_num,) = self.unpack(CHUNK)
+        chunk.docs = self.strings()
+        chunk.code = self.strings()
+        chunk.types = self.strings()
+        chunk.names = self.strings()
+        chunk.directives = json.loads(self.string())
+        return chunk
+
+    def result(self) -> FileResult:
+        full_path = self.string()
+        key = self.string()
+        (count,) = self.unpack(RESULT)
+        return FileResult(full_path, [self.chunk() for _ in range(count)], key)
+
+
+def loads_binary(data: bytes) -> List[FileResult]:
+    decoder = Decoder(data)
+    try:
+        magic, version, count = decoder.unpack(HEADER)
+    except struct.error:
+        raise ValueError("Truncated chunk data")
+    if magic != MAGIC:
+        raise ValueError("Not chunk data")
+    if version != FORMAT_VERSION:
+        raise ValueError("Unsupported chunk format version {}".format(version))
+    try:
+        return [decoder.result() for _ in range(count)]
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError("Corrupt chunk data: {}".format(e))
+
+
+#
+# JSON lines encoding, for debugging and other tools
+#
+# A header line, then for every file a line with its path, key and chunk
+# count followed by one line per chunk.
+#
+
+
+def dump_jsonl(results: Iterable[FileResult], stream: IO[str]):
+    header = {"format": JSONL_FORMAT, "version": FORMAT_VERSION}
+    stream.write(json.dumps(header) + "\n")
+    for result in results:
+        file_line = {
+            "file": result.full_path,
+            "key": result.key,
+            "chunks": len(result.chunks),
+        }
+        stream.write(json.dumps(file_line) + "\n")
+        for chunk in result.chunks:
+            stream.write(json.dumps(chunk_to_dict(chunk)) + "\n")
+
+
+def load_jsonl(stream: IO[str]) -> List[FileResult]:
+    lines = iter(stream)
+    header = json.loads(next(lines, "{}"))
+    if header.get("format") != JSONL_FORMAT:
+        raise ValueError("Not chunk data")
+    if header.get("version") != FORMAT_VERSION:
+        raise ValueError(
+            "Unsupported chunk format version {}".format(header.get("version"))
+        )
+    results = list()
+    for line in lines:
+        file_line = json.loads(line)
+        chunks = [
+            chunk_from_dict(json.loads(next(lines)))
+            for _ in range(file_line["chunks"])
+        ]
+        results.append(FileResult(file_line["file"], chunks, file_line["key"]))
+    return results
@@ -1,7 +1,12 @@
 import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
 
-from cxmeta.pipeline.stream import Processor, InputFile, InputDirectory
+from cxmeta.config import module_name
+from cxmeta.pipeline.stream import Processor, InputFile, InputDirectory, Chunk
 from cxmeta.pipeline.combiner import Combiner
+from cxmeta.pipeline.discovery import PathFilter
+from cxmeta.pipeline.metrics import FileMetrics
 
 
 class Module(Processor):
@@ -13,9 +18,8 @@ class Module(Processor):
         self.debug_files = project.config.get("debug_files", False)
         self.include_paths = project.config.get("include_paths", list())
         self.files = list()
-        self.include_extensions = project.config.get(
-            "include_extensions", list()
-        )
+        self.directories = list()
+        self.path_filter = PathFilter(project)
 
     def __str__(self):
         return "[Module] <name: {}, full_path: {}".format(
@@ -23,43 +27,47 @@ class Module(Processor):
         )
 
     def process(self):
+        self.discover()
+        process_combiners(self.project, self.files)
+        return self
+
+    def discover(self):
+        """
+        Collect a combiner for every source file of this module and its
+        allowed sub-modules, in directory order, without processing them
+        """
         if self.debug_files:
             print("# Processing module {}".format(self.name))
         # Look for a header / README.md
+        path_filter = self.path_filter
+        self.directories.append(self.source.full_path)
         for input_file in self.source.read():
-            if os.path.isdir(input_file.full_path) and self.allowed_sub_path(
-                input_file.full_path
-            ):
-                # Create a new module to handle the directory
-                sub_module = Module(
-                    self.project, InputDirectory(input_file.full_path)
-                )
-                if self.debug_files:
-                    print("# Allowed sub-module {}".format(sub_module))
-                sub_module.process()
-                self.files.extend(sub_module.files)
-                continue
-
-            _, ext = os.path.splitext(input_file.full_path)
-            if ext in self.include_extensions:
-                if self.debug_files:
-                    print(
-                        "## [{}] processing path {}".format(
-                            self.name, input_file.full_path
-                        )
-                    )
-                file_proc = Combiner(self.project, self, input_file)
-                file_proc.process()
-                self.files.append(file_proc)
+            full_path = input_file.full_path
+            if path_filter.is_excluded(full_path):
+                self.debug_path("excluding", full_path)
+            elif input_file.is_directory():
+                if self.allowed_sub_path(full_path):
+                    self.discover_sub_module(full_path)
+            elif path_filter.is_included_file(full_path):
+                self.debug_path("processing", full_path)
+                self.files.append(Combiner(self.project, self, input_file))
             else:
-                if self.debug_files:
-                    print(
-                        "## [{}] ignoring path {}".format(
-                            self.name, input_file.full_path
-                        )
-                    )
+                self.debug_path("ignoring", full_path)
         return self
 
+    def debug_path(self, action, full_path):
+        if self.debug_files:
+            print("## [{}] {} path {}".format(self.name, action, full_path))
+
+    def discover_sub_module(self, full_path):
+        # Create a new module to handle the directory
+        sub_module = Module(self.project, InputDirectory(full_path))
+        if self.debug_files:
+            print("# Allowed sub-module {}".format(sub_module))
+        sub_module.discover()
+        self.files.extend(sub_module.files)
+        self.directories.extend(sub_module.directories)
+
     def allowed_sub_path(self, full_path):
         # TODO: assume input_file is a child of module path
         #  this could be a mistake
@@ -69,11 +77,92 @@ class Module(Processor):
         return False
 
 
-# Convert the directory name of the path into the module name
-def module_name(source_path):
-    path_parts = os.path.split(source_path)
-    if not path_parts[-1]:
-        name = os.path.basename(path_parts[0])
-    else:
-        name = os.path.basename(path_parts[-1])
-    return name
+def get_job_count(config) -> int:
+    """Number of worker processes to use, 0 selects one per core"""
+    jobs = int(config.get("jobs", 1))
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    return jobs
+
+
+def combine_file(
+    project, module_source, source
+) -> Tuple[List[Chunk], Optional[FileMetrics]]:
+    """
+    Run the combiner on a single source file, returning the chunks and
+    the file metrics when instrumentation is enabled.
+
+    This is the unit of work handed to worker processes so the arguments
+    and the result must all be picklable.
+    """
+    module = Module(project, module_source)
+    combiner = Combiner(project, module, source).process()
+    return combiner.stream().content, combiner.metrics
+
+
+def process_combiners(project, combiners: List[Combiner]) -> List[Combiner]:
+    """
+    Process the combiners serially or fanned out over a process pool.
+
+    Results are merged back in the order of the combiners list so the output
+    does not depend on the number of workers. When the project has a parse
+    cache only the files that miss are processed, the others are loaded
+    from the cache. Returns the combiners that were processed.
+    """
+    pending = load_cached(project, combiners)
+    run_combiners(pending, get_job_count(project.config))
+    store_cached(project, pending)
+    return pending
+
+
+def load_cached(project, combiners: List[Combiner]) -> List[Combiner]:
+    """
+    Load the chunks of the combiners found in the project's parse cache,
+    returns the combiners that still need processing
+    """
+    cache = project.cache
+    if cache is None:
+        return combiners
+    pending = list()
+    for combiner in combiners:
+        chunks = cache.get(combiner.source)
+        if chunks is None:
+            pending.append(combiner)
+        else:
+            combiner.load(chunks)
+            if combiner.instrument:
+                combiner.metrics = FileMetrics(
+                    combiner.source.full_path, cached=True
+                )
+    return pending
+
+
+def store_cached(project, combiners: List[Combiner]):
+    cache = project.cache
+    if cache is not None:
+        for combiner in combiners:
+            cache.put(combiner.source, combiner.stream().content)
+
+
+def run_combiners(combiners: List[Combiner], jobs: int):
+    """
+    Process the combiners, which may belong to different projects, with up
+    to jobs worker processes
+    """
+    if jobs <= 1 or len(combiners) <= 1:
+        for combiner in combiners:
+            combiner.process()
+        return
+
+    chunk_size = max(1, len(combiners) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = executor.map(
+            combine_file,
+            [combiner.project for combiner in combiners],
+            [combiner.module.source for combiner in combiners],
+            [combiner.source for combiner in combiners],
+            chunksize=chunk_size,
+        )
+        for combiner, (chunks, metrics) in zip(combiners, results):
+            combiner.load(chunks)
+            combiner.metrics = metrics
@@ -1,4 +1,8 @@
 import os
+import mmap
+import hashlib
+from contextlib import contextmanager
+from typing import Optional
 from cxmeta.config import random_name
 
 
@@ -11,6 +15,8 @@ class StreamDatum(object):
 
     """
 
+    __slots__ = ()
+
     def __init__(self):
         pass
 
@@ -26,8 +32,16 @@ class InputDirectory(StreamDatum):
         self.full_path = full_path
 
     def read(self):
-        for name in os.listdir(self.full_path):
-            yield InputFile(os.path.join(self.full_path, name))
+        # scandir returns the entry type along with the name so no
+        # additional stat is needed to tell directories from files
+        with os.scandir(self.full_path) as entries:
+            entries = sorted(entries, key=lambda entry: entry.name)
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = None
+            yield InputFile(entry.path, is_dir)
 
 
 class InputFile(StreamDatum):
@@ -36,17 +50,54 @@ class InputFile(StreamDatum):
     by it's full path.
     """
 
-    def __init__(self, full_path):
+    # Set when the file type is already known from directory scanning
+    dir_hint: Optional[bool] = None
+
+    def __init__(self, full_path, dir_hint=None):
         StreamDatum.__init__(self)
         self.full_path = full_path
+        self.dir_hint = dir_hint
 
     def __str__(self):
         return self.full_path
 
+    def is_directory(self):
+        if self.dir_hint is None:
+            return os.path.isdir(self.full_path)
+        return self.dir_hint
+
+    def digest(self):
+        """Content hash of the file"""
+        content_hash = hashlib.sha256()
+        with open(self.full_path, "rb") as open_file:
+            for block in iter(lambda: open_file.read(1 << 16), b""):
+                content_hash.update(block)
+        return content_hash.hexdigest()
+
+    def read_text(self):
+        """The whole file as one newline separated string"""
+        with open(self.full_path, "r") as open_file:
+            return open_file.read()
+
+    @contextmanager
+    def open_buffer(self, use_mmap=False):
+        """
+        The raw file content, either read in bulk or memory mapped
+        """
+        with open(self.full_path, "rb") as open_file:
+            size = os.fstat(open_file.fileno()).st_size
+            if use_mmap and size > 0:
+                with mmap.mmap(
+                    open_file.fileno(), 0, access=mmap.ACCESS_READ
+                ) as buffer:
+                    yield buffer
+            else:
+                yield open_file.read()
+
     def read(self):
         with open(self.full_path, "r") as open_file:
             line_num = 0
-            for line in open_file.readlines():
+            for line in open_file:
                 line_num += 1
                 yield Line(line_num, line.rstrip("\r\n"))
 
@@ -60,17 +111,37 @@ class InputBuffer(InputFile):
         InputFile.__init__(self, name)
         self.buffer = buffer
 
-    def read(self):
-        line_num = 0
+    def digest(self):
+        content_hash = hashlib.sha256()
         if type(self.buffer) is list:
             for line_data in self.buffer:
-                line_num += 1
-                yield Line(line_num, line_data)
+                content_hash.update(line_data.encode("utf8"))
+                content_hash.update(b"\n")
+        else:
+            content_hash.update(self.buffer.encode("utf8"))
+        return content_hash.hexdigest()
+
+    def lines(self):
+        if type(self.buffer) is list:
+            return self.buffer
         elif type(self.buffer) is str:
-            for line_data in self.buffer.splitlines():
-                line_num += 1
-                yield Line(line_num, line_data)
-        yield Line(1, "")
+            return self.buffer.splitlines()
+        return list()
+
+    def read_text(self):
+        # The trailing empty line mirrors the one produced by read()
+        return "".join(line_data + "\n" for line_data in self.lines()) + "\n"
+
+    @contextmanager
+    def open_buffer(self, use_mmap=False):
+        yield self.read_text().encode("utf8")
+
+    def read(self):
+        line_num = 0
+        for line_data in self.lines():
+            line_num += 1
+            yield Line(line_num, line_data)
+        yield Line(line_num + 1, "")
 
 
 class OutputFile(StreamDatum):
@@ -90,6 +161,8 @@ class Line(StreamDatum):
     based processor.
     """
 
+    __slots__ = ("line_num", "data")
+
     def __init__(self, line_num, data):
         StreamDatum.__init__(self)
         self.line_num = line_num
@@ -104,16 +177,35 @@ class Line(StreamDatum):
 class Atom(object):
     """
     Represents a parsed atom from a line
+
+    Atoms are created for every token of every line so they are kept
+    compact, the kind is a small integer code defined by the processor
+    that emitted it and value is the captured text, if any.
     """
 
-    def __init__(self, line_num, pos, data):
+    __slots__ = ("line_num", "pos", "kind", "value")
+
+    def __init__(self, line_num, pos, kind, value=None):
         self.line_num = line_num
         self.pos = pos
-        self.data = data
+        self.kind = kind
+        self.value = value
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, Atom)
+            and self.line_num == other.line_num
+            and self.pos == other.pos
+            and self.kind == other.kind
+            and self.value == other.value
+        )
+
+    def __hash__(self):
+        return hash((self.line_num, self.pos, self.kind, self.value))
 
     def __str__(self):
-        return "[Atom] loc: {}:{}, data: '{}'".format(
-            self.line_num, self.pos, self.data
+        return "[Atom] loc: {}:{}, kind: {}, value: '{}'".format(
+            self.line_num, self.pos, self.kind, self.value
         )
 
 
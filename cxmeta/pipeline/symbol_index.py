@@ -0,0 +1,117 @@
+import re
+import json
+from typing import Dict, Iterable, List, Optional
+
+from cxmeta.pipeline.stream import Chunk
+
+INDEX_FORMAT = "cxmeta-symbols"
+INDEX_VERSION = 2
+FIELDS = ("name", "module", "file", "line", "types", "output", "offset")
+
+MACRO_NAME_REGEXP = re.compile(r"#\s*define\s+(?P<name>\w+)")
+
+
+def symbol_name(chunk: Chunk) -> Optional[str]:
+    """
+    The name a chunk declares, the last identifier before any parameter
+    list or the name of a macro definition
+    """
+    if chunk.names:
+        return chunk.names[-1]
+    if "macro" in chunk.types:
+        match = MACRO_NAME_REGEXP.search("".join(chunk.code))
+        if match is not None:
+            return match.group("name")
+    return None
+
+
+class Symbol(object):
+    """
+    Location of a documented declaration. The offset is the position, in
+    bytes, of the declaration's section in the written markdown output so
+    readers can seek to it or slice a memory map of the file.
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, name, module, file, line, types, output, offset):
+        self.name = name
+        self.module = module
+        self.file = file
+        self.line = line
+        self.types = types
+        self.output = output
+        self.offset = offset
+
+    def __eq__(self, other):
+        return isinstance(other, Symbol) and self.row() == other.row()
+
+    def __str__(self):
+        return "[Symbol] <name: {}, file: {}:{}, output: {}@{}>".format(
+            self.name, self.file, self.line, self.output, self.offset
+        )
+
+    def row(self) -> list:
+        return [getattr(self, field) for field in FIELDS]
+
+
+class SymbolIndex(object):
+    """
+    Symbols of a project by name, a name can be declared more than once.
+
+    Serialized as JSON lines, a header naming the fields followed by one
+    array per symbol so rows stay small and parse quickly.
+    """
+
+    def __init__(self):
+        self.symbols: Dict[str, List[Symbol]] = dict()
+
+    def __len__(self):
+        return sum(len(symbols) for symbols in self.symbols.values())
+
+    def add(self, symbol: Symbol):
+        self.symbols.setdefault(symbol.name, list()).append(symbol)
+
+    def lookup(self, name) -> List[Symbol]:
+        return self.symbols.get(name, list())
+
+    def all(self) -> Iterable[Symbol]:
+        for symbols in self.symbols.values():
+            yield from symbols
+
+    def dumps(self) -> str:
+        header = {
+            "format": INDEX_FORMAT,
+            "version": INDEX_VERSION,
+            "fields": FIELDS,
+        }
+        lines = [json.dumps(header)]
+        for symbol in self.all():
+            lines.append(json.dumps(symbol.row(), separators=(",", ":")))
+        lines.append("")
+        return "\n".join(lines)
+
+    @staticmethod
+    def loads(text: str) -> "SymbolIndex":
+        lines = text.splitlines()
+        header = json.loads(lines[0]) if lines else dict()
+        if header.get("format") != INDEX_FORMAT:
+            raise ValueError("Not a symbol index")
+        if header.get("version") != INDEX_VERSION:
+            raise ValueError(
+                "Unsupported symbol index version {}".format(
+                    header.get("version")
+                )
+            )
+        positions = [header["fields"].index(field) for field in FIELDS]
+        # Decoding all rows as one array is much faster than line by line
+        rows = json.loads("[" + ",".join(filter(None, lines[1:])) + "]")
+        index = SymbolIndex()
+        for row in rows:
+            index.add(Symbol(*[row[i] for i in positions]))
+        return index
+
+    @staticmethod
+    def load(path) -> "SymbolIndex":
+        with open(path, "r", encoding="utf8") as index_file:
+            return SymbolIndex.loads(index_file.read())
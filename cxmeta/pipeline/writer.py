@@ -0,0 +1,147 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List
+
+from cxmeta.config import random_name
+
+ENCODING = "utf8"
+COMPARE_BLOCK_SIZE = 1 << 16
+
+
+def encode_output(text: str, newline=None) -> bytes:
+    """
+    Encode text the way a text mode file opened with newline would
+    """
+    if newline is None:
+        newline = os.linesep
+    if newline and newline != "\n":
+        text = text.replace("\n", newline)
+    return text.encode(ENCODING)
+
+
+def encoded_offsets(text: str, offsets: List[int], newline=None) -> List[int]:
+    """
+    Byte positions in encode_output(text, newline) of the increasing
+    character offsets of text
+    """
+    if newline is None:
+        newline = os.linesep
+    if text.isascii() and newline in ("", "\n"):
+        return list(offsets)
+    positions = list()
+    start = 0
+    size = 0
+    for offset in offsets:
+        size += len(encode_output(text[start:offset], newline))
+        start = offset
+        positions.append(size)
+    return positions
+
+
+def same_content(path: str, data: bytes) -> bool:
+    """
+    True when the file at path already holds exactly data. The size is
+    compared first so most changed files are detected without reading them.
+    """
+    try:
+        if os.stat(path).st_size != len(data):
+            return False
+        with open(path, "rb") as existing:
+            view = memoryview(data)
+            offset = 0
+            for block in iter(lambda: existing.read(COMPARE_BLOCK_SIZE), b""):
+                if view[offset : offset + len(block)] != block:
+                    return False
+                offset += len(block)
+            return offset == len(data)
+    except OSError:
+        return False
+
+
+def atomic_write(path: str, data: bytes):
+    """
+    Write data to path through a temporary file in the same directory that
+    is renamed over the target, readers see the old or the new content but
+    never a partial file.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(
+        directory, ".{}.{}.tmp".format(os.path.basename(path), random_name())
+    )
+    # Unlike mkstemp the permissions follow the umask as open() would
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as output_file:
+            output_file.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class OutputWriter(object):
+    """
+    Writes rendered outputs, either inline or through a bounded pool of
+    threads so the open, write and rename latency of many small files
+    overlaps. At most jobs * 2 outputs are held in memory waiting to be
+    written, submit() blocks when that many are pending.
+
+    With skip_unchanged outputs whose file already has the same content
+    are left alone, keeping their modification time.
+
+    Use as a context manager, leaving it waits for every write and raises
+    the first error encountered. When the block itself raises the writes
+    still finish but their errors are dropped, so they can't hide it.
+    """
+
+    def __init__(self, jobs: int = 1, newline=None, skip_unchanged=False):
+        self.jobs = jobs
+        self.newline = newline
+        self.skip_unchanged = skip_unchanged
+        self.written = 0
+        self.skipped = 0
+        self.lock = threading.Lock()
+        self.executor = None
+        self.futures: List[Future] = list()
+        if jobs > 1:
+            self.executor = ThreadPoolExecutor(
+                max_workers=jobs, thread_name_prefix="cxmeta-writer"
+            )
+            self.pending = threading.BoundedSemaphore(jobs * 2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(check=exc_type is None)
+
+    def write(self, path: str, text: str):
+        data = encode_output(text, self.newline)
+        unchanged = self.skip_unchanged and same_content(path, data)
+        if not unchanged:
+            atomic_write(path, data)
+        with self.lock:
+            if unchanged:
+                self.skipped += 1
+            else:
+                self.written += 1
+
+    def submit(self, path: str, text: str):
+        if self.executor is None:
+            self.write(path, text)
+            return
+        self.pending.acquire()
+        future = self.executor.submit(self.write, path, text)
+        future.add_done_callback(lambda _: self.pending.release())
+        self.futures.append(future)
+
+    def close(self, check=True):
+        if self.executor is None:
+            return
+        self.executor.shutdown(wait=True)
+        self.executor = None
+        if check:
+            for future in self.futures:
+                future.result()
@@ -1,4 +1,6 @@
 import abc
+import re
+from typing import Iterator, List, Optional, Tuple
 from cxmeta.pipeline.stream import Chunk
 from cxmeta.pipeline.source_module import Module
 from cxmeta.pipeline.combiner import Combiner
@@ -9,10 +11,97 @@ def cxmeta_footer() -> str:
     return "\n\n_Generated by [{link}]({link}) :cactus:_".format(link=link)
 
 
+ANCHOR_STRIP_REGEXP = re.compile(r"[^\w\- ]")
+
+
+def gfm_anchor(heading: str) -> str:
+    """The anchor GitHub generates for a heading"""
+    return ANCHOR_STRIP_REGEXP.sub("", heading.strip().lower()).replace(
+        " ", "-"
+    )
+
+
+FENCE_REGEXP = re.compile(r" {0,3}(`{3,}|~{3,})")
+INDENTED_CODE_REGEXP = re.compile(r"(?: {4}|\t)\s*\S")
+HEADING_REGEXP = re.compile(r" {0,3}#{1,6}(?:[ \t]+(.*?))?[ \t#]*$")
+
+
+def markdown_blocks(text: str) -> Iterator[Tuple[bool, str]]:
+    """
+    Split markdown into runs of lines, True for the runs that are fenced or
+    indented code blocks. Joining the runs gives back the text.
+    """
+    if "```" not in text and "~~~" not in text and "    " not in text:
+        if "\t" not in text:
+            yield False, text
+            return
+    run: List[str] = list()
+    run_is_code = False
+    fence = None
+    previous_blank = True
+    indented = False
+    for line in text.splitlines(keepends=True):
+        match = FENCE_REGEXP.match(line)
+        if fence is not None:
+            is_code = True
+            if match and match.group(1).startswith(fence):
+                fence = None
+        elif match:
+            is_code = True
+            fence = match.group(1)
+            indented = False
+        else:
+            # Indented code can not interrupt a paragraph
+            indented = (previous_blank or indented) and bool(
+                INDENTED_CODE_REGEXP.match(line)
+            )
+            is_code = indented
+        previous_blank = not line.strip()
+        if is_code != run_is_code and run:
+            yield run_is_code, "".join(run)
+            run.clear()
+        run_is_code = is_code
+        run.append(line)
+    if run:
+        yield run_is_code, "".join(run)
+
+
+def markdown_headings(text: str) -> Iterator[str]:
+    """The text of the ATX headings of markdown, outside of code blocks"""
+    for is_code, run in markdown_blocks(text):
+        if is_code or "#" not in run:
+            continue
+        for line in run.splitlines():
+            match = HEADING_REGEXP.match(line)
+            if match is not None:
+                yield match.group(1) or ""
+
+
 def make_md_link(name, link):
     return ":link: [{}]({})".format(name, link)
 
 
+def stripped_parts(parts: List[str], leading: bool = True) -> List[str]:
+    """
+    The same text as "".join(parts).strip(), or rstrip() when leading is
+    False, but still in parts so it can be appended without joining
+    """
+    end = len(parts)
+    while end and not parts[end - 1].strip():
+        end -= 1
+    start = 0
+    if leading:
+        while start < end and not parts[start].strip():
+            start += 1
+    if start == end:
+        return list()
+    stripped = parts[start:end]
+    if leading:
+        stripped[0] = stripped[0].lstrip()
+    stripped[-1] = stripped[-1].rstrip()
+    return stripped
+
+
 class GfmStyle(metaclass=abc.ABCMeta):
     @abc.abstractmethod
     def start_module(self, module: Module) -> str:
@@ -35,3 +124,21 @@ class GfmStyle(metaclass=abc.ABCMeta):
         self, module: Module, source_file: Combiner, chunk: Chunk
     ) -> str:
         pass
+
+    def render_chunk(
+        self,
+        output: List[str],
+        module: Module,
+        source_file: Combiner,
+        chunk: Chunk,
+    ):
+        """
+        Append the rendered chunk to the output parts, the exporter joins
+        them once per output file. Styles override this to skip building a
+        string per chunk.
+        """
+        output.append(self.chunk(module, source_file, chunk))
+
+    def chunk_heading(self, chunk: Chunk) -> Optional[str]:
+        """Text of the heading the style renders for the chunk, if any"""
+        return None
@@ -1,8 +1,15 @@
-from cxmeta.style.gfm_common import GfmStyle, cxmeta_footer, make_md_link
+from typing import List, Optional
+from cxmeta.style.gfm_common import (
+    GfmStyle,
+    cxmeta_footer,
+    make_md_link,
+    stripped_parts,
+)
 from cxmeta.pipeline.stream import Chunk
 from cxmeta.pipeline.source_module import Module
-from cxmeta.pipeline.source_module import module_name
+from cxmeta.config import module_name
 from cxmeta.pipeline.combiner import Combiner
+from cxmeta.pipeline.symbol_index import symbol_name
 
 
 class GfmProjectIndexStyle(GfmStyle):
@@ -40,34 +47,41 @@ class GfmProjectIndexStyle(GfmStyle):
     def end_source_file(self, module: Module, source_file: Combiner) -> str:
         return ""
 
+    def chunk_heading(self, chunk: Chunk) -> Optional[str]:
+        name = symbol_name(chunk)
+        if name is None:
+            return None
+        return "`{}` ({})".format(name, " ".join(chunk.types))
+
     def chunk(
         self, module: Module, source_file: Combiner, chunk: Chunk
     ) -> str:
-        export = [
-            "#### ",
-            "`",
-            chunk.names[-1],
-            "` (",
-            " ".join(chunk.types),
-            ")",
-            self.newline,
-            self.newline,
-            "".join(chunk.docs),
-            self.newline,
-        ]
+        output: List[str] = list()
+        self.render_chunk(output, module, source_file, chunk)
+        return "".join(output)
 
-        trimmed_stmt = "".join(chunk.code).strip()
-        if trimmed_stmt:
-            export.extend(
-                [
-                    "~~~c",
-                    self.newline,
-                    trimmed_stmt,
-                    self.newline,
-                    "~~~",
-                    self.newline,
-                    self.newline,
-                ]
-            )
+    def render_chunk(
+        self,
+        output: List[str],
+        module: Module,
+        source_file: Combiner,
+        chunk: Chunk,
+    ):
+        # The chunk_heading text, appended in parts. Chunks without a
+        # name, like a file header comment, have no heading.
+        name = symbol_name(chunk)
+        if name is not None:
+            output += ["#### `", name, "` ("]
+            for i, chunk_type in enumerate(chunk.types):
+                if i:
+                    output.append(" ")
+                output.append(chunk_type)
+            output += [")", self.newline, self.newline]
+        output += chunk.docs
+        output.append(self.newline)
 
-        return "".join(export)
+        trimmed_stmt = stripped_parts(chunk.code)
+        if trimmed_stmt:
+            output += ["~~~c", self.newline]
+            output += trimmed_stmt
+            output += [self.newline, "~~~", self.newline, self.newline]
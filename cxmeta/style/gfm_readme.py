@@ -1,14 +1,14 @@
 import os
-from typing import List
-from cxmeta.style.gfm_common import GfmStyle
+from typing import List, Optional
+from cxmeta.style.gfm_common import GfmStyle, stripped_parts
 from cxmeta.pipeline.stream import Chunk
 from cxmeta.pipeline.source_module import Module
 from cxmeta.pipeline.combiner import Combiner
 
 
 class GfmReadmeStyle(GfmStyle):
-    def __init__(self):
-        self.newline = os.linesep
+    def __init__(self, project=None):
+        self.newline = project.newline if project else os.linesep
 
     def start_module(self, module: Module) -> str:
         self.newline = module.project.newline
@@ -23,26 +23,35 @@ class GfmReadmeStyle(GfmStyle):
     def end_source_file(self, module: Module, source_file: Combiner) -> str:
         return ""
 
+    def chunk_heading(self, chunk: Chunk) -> Optional[str]:
+        if chunk.names:
+            return " ".join(chunk.names)
+        return None
+
     def chunk(
         self, module: Module, source_file: Combiner, chunk: Chunk
     ) -> str:
-        buffer: List[str] = list()
+        output: List[str] = list()
+        self.render_chunk(output, module, source_file, chunk)
+        return "".join(output)
+
+    def render_chunk(
+        self,
+        output: List[str],
+        module: Module,
+        source_file: Combiner,
+        chunk: Chunk,
+    ):
         # Make a simple chunk title out of any proper names
-        if chunk.names:
-            buffer += [ "### ", ' '.join(chunk.names), self.newline, self.newline ]
+        heading = self.chunk_heading(chunk)
+        if heading:
+            output += ["### ", heading, self.newline, self.newline]
 
         # Main document section
-        buffer += ["".join(chunk.docs)]
+        output += chunk.docs
 
         # Additional code section
         if chunk.code:
-            buffer += [
-                self.newline,
-                "```c",
-                self.newline,
-                "".join(chunk.code).rstrip(),
-                self.newline,
-                "```",
-                self.newline,
-                self.newline]
-        return "".join(buffer)
+            output += [self.newline, "```c", self.newline]
+            output += stripped_parts(chunk.code, leading=False)
+            output += [self.newline, "```", self.newline, self.newline]
@@ -1,15 +1,35 @@
-from typing import Optional, Mapping, Type
-from cxmeta.style.gfm_common import GfmStyle
-from cxmeta.style.gfm_project_index import GfmProjectIndexStyle
-from cxmeta.style.gfm_readme import GfmReadmeStyle
-
-STYLES: Mapping[str, Type[GfmStyle]] = {
-    "project_index": GfmProjectIndexStyle,
-    "readme": GfmReadmeStyle,
+import importlib
+from typing import Optional, Mapping, Type, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from cxmeta.style.gfm_common import GfmStyle
+
+# Styles are named by their import path so the style classes, and the
+# pipeline they depend on, are only imported once a style is used
+STYLES: Mapping[str, str] = {
+    "project_index": "cxmeta.style.gfm_project_index:GfmProjectIndexStyle",
+    "readme": "cxmeta.style.gfm_readme:GfmReadmeStyle",
+    # The same styles declared as templates, see cxmeta.style.template
+    "project_index_template": (
+        "cxmeta.style.template:ProjectIndexTemplateStyle"
+    ),
+    "readme_template": "cxmeta.style.template:ReadmeTemplateStyle",
+}
+
+# Shown by --help-styles without importing the styles
+STYLE_DESCRIPTIONS: Mapping[str, str] = {
+    "project_index": "Index of the project with a heading per source file",
+    "readme": "A single README of the documented declarations",
+    "project_index_template": "The project_index style declared as templates",
+    "readme_template": "The readme style declared as templates",
 }
 
 DEFAULT_STYLE = "readme"
 
 
-def get_style_type(name: str) -> Optional[Type[GfmStyle]]:
-    return STYLES.get(name)
+def get_style_type(name: str) -> Optional[Type["GfmStyle"]]:
+    path = STYLES.get(name)
+    if path is None:
+        return None
+    module_path, class_name = path.split(":")
+    return getattr(importlib.import_module(module_path), class_name)
@@ -0,0 +1,342 @@
+import re
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+
+from cxmeta.config import module_name
+from cxmeta.pipeline.combiner import Combiner
+from cxmeta.pipeline.source_module import Module
+from cxmeta.pipeline.stream import Chunk
+from cxmeta.pipeline.symbol_index import symbol_name
+from cxmeta.style.gfm_common import GfmStyle, cxmeta_footer, stripped_parts
+
+# Template fields are Python expressions of module, source_file and chunk,
+# inlined into the compiled render functions. Part fields are lists of
+# strings appended as they are, the others are single strings.
+FIELDS: Mapping[str, str] = {
+    "module_name": "module.name",
+    "source_name": "module_name(source_file.source.full_path)",
+    "source_path": "source_file.project_relative_path",
+    "names": '" ".join(chunk.names)',
+    "last_name": 'symbol_name(chunk) or ""',
+    "types": '" ".join(chunk.types)',
+    "has_code": "chunk.code",
+    "footer": "cxmeta_footer()",
+    "heading": "heading(module, source_file, chunk)",
+}
+PART_FIELDS: Mapping[str, str] = {
+    "docs": "chunk.docs",
+    "code": "stripped_parts(chunk.code, False)",
+    "code_stripped": "stripped_parts(chunk.code)",
+}
+# The heading is rendered from the chunk alone for chunk_heading
+CHUNK_FIELDS = {
+    "names",
+    "last_name",
+    "types",
+    "has_code",
+    "docs",
+    "code",
+    "code_stripped",
+}
+
+SECTIONS = (
+    "heading",
+    "start_module",
+    "end_module",
+    "start_source_file",
+    "end_source_file",
+    "chunk",
+)
+
+TEMPLATE_TOKEN_REGEXP = re.compile(
+    r"\{(?P<tag>[?/]?)(?P<name>\w+)\}|\{\{|\}\}"
+)
+
+# A parsed template is a list of nodes: ("text", value), ("field", name)
+# and ("if", name, nodes) for a section rendered when the field is not empty
+Node = Tuple
+
+
+class TemplateParser(object):
+    """
+    Parses one template, {newline} and the fields in inline are replaced by
+    their nodes right away and adjacent text is merged into one constant
+    fragment. Only the names in fields can be substituted or tested.
+    """
+
+    def __init__(self, newline: str, inline=None, fields=None):
+        self.newline = newline
+        self.inline: Mapping[str, List[Node]] = inline or dict()
+        self.fields = fields
+        self.root: List[Node] = list()
+        self.stack: List[Tuple[Optional[str], List[Node]]] = [
+            (None, self.root)
+        ]
+
+    def parse(self, text: str) -> List[Node]:
+        pos = 0
+        for match in TEMPLATE_TOKEN_REGEXP.finditer(text):
+            self.add_text(text[pos : match.start()])
+            pos = match.end()
+            name = match.group("name")
+            tag = match.group("tag")
+            if name is None:
+                self.add_text(match.group()[0])
+            elif tag == "?":
+                self.open_section(name)
+            elif tag == "/":
+                self.close_section(name)
+            else:
+                self.substitute(name)
+        self.add_text(text[pos:])
+        if len(self.stack) > 1:
+            raise ValueError(
+                "Unclosed {{?{}}} in template".format(self.stack[-1][0])
+            )
+        return self.root
+
+    def check_field(self, name: str):
+        if self.fields is not None and name not in self.fields:
+            raise ValueError("Field '{}' not allowed in template".format(name))
+
+    def add_text(self, value: str):
+        nodes = self.stack[-1][1]
+        if nodes and nodes[-1][0] == "text":
+            nodes[-1] = ("text", nodes[-1][1] + value)
+        elif value:
+            nodes.append(("text", value))
+
+    def open_section(self, name: str):
+        self.check_field(name)
+        # A condition on an inlined single field tests that field
+        condition = name
+        nodes = self.inline.get(name, ())
+        if len(nodes) == 1 and nodes[0][0] == "field":
+            condition = nodes[0][1]
+        section: List[Node] = list()
+        self.stack[-1][1].append(("if", condition, section))
+        self.stack.append((name, section))
+
+    def close_section(self, name: str):
+        if self.stack[-1][0] != name:
+            raise ValueError("Unexpected {{/{}}} in template".format(name))
+        self.stack.pop()
+
+    def substitute(self, name: str):
+        if name == "newline":
+            self.add_text(self.newline)
+            return
+        self.check_field(name)
+        for node in self.inline.get(name, [("field", name)]):
+            if node[0] == "text":
+                self.add_text(node[1])
+            else:
+                self.stack[-1][1].append(node)
+
+
+def parse_template(
+    text: str,
+    newline: str,
+    inline: Optional[Mapping[str, List[Node]]] = None,
+    fields: Optional[Iterable[str]] = None,
+) -> List[Node]:
+    """
+    Parse a template into nodes, raises ValueError when it is unbalanced or
+    uses a field that is not in fields
+    """
+    if fields is not None:
+        fields = set(fields)
+    return TemplateParser(newline, inline, fields).parse(text)
+
+
+def used_fields(nodes: List[Node]) -> List[str]:
+    names = list()
+    for node in nodes:
+        if node[0] == "text":
+            continue
+        if node[1] not in names:
+            names.append(node[1])
+        if node[0] == "if":
+            names.extend(n for n in used_fields(node[2]) if n not in names)
+    return names
+
+
+def generate_nodes(nodes: List[Node], indent: str, lines: List[str]):
+    run: List[str] = list()
+
+    def flush():
+        if len(run) == 1:
+            lines.append("{}output.append({})".format(indent, run[0]))
+        elif run:
+            lines.append("{}output += ({})".format(indent, ", ".join(run)))
+        run.clear()
+
+    for node in nodes:
+        if node[0] == "text":
+            run.append(repr(node[1]))
+        elif node[0] == "field" and node[1] not in PART_FIELDS:
+            run.append("f_" + node[1])
+        elif node[0] == "field":
+            flush()
+            lines.append("{}output += f_{}".format(indent, node[1]))
+        else:
+            flush()
+            lines.append("{}if f_{}:".format(indent, node[1]))
+            body_start = len(lines)
+            generate_nodes(node[2], indent + "    ", lines)
+            if len(lines) == body_start:
+                lines.append(indent + "    pass")
+    flush()
+
+
+def compile_template(
+    nodes: List[Node],
+    namespace: Dict,
+    name: str = "template",
+    fields: Mapping[str, str] = FIELDS,
+) -> Callable:
+    """
+    Compile parsed template nodes into a function render(output, module,
+    source_file, chunk) appending the rendered parts to output. Constant
+    fragments are built once here, the function only evaluates the fields
+    the template uses.
+    """
+    lines = ["def render(output, module, source_file, chunk):"]
+    for field in used_fields(nodes):
+        expression = fields.get(field, PART_FIELDS.get(field))
+        if expression is None:
+            raise ValueError("Unknown template field '{}'".format(field))
+        lines.append("    f_{} = {}".format(field, expression))
+    generate_nodes(nodes, "    ", lines)
+    if len(lines) == 1:
+        lines.append("    pass")
+    scope = dict(namespace)
+    exec(compile("\n".join(lines), "<{}>".format(name), "exec"), scope)
+    return scope["render"]
+
+
+class TemplateStyle(GfmStyle):
+    """
+    A style declared by templates, one per section in TEMPLATES, compiled
+    into render functions when the style is created. Missing sections
+    render nothing.
+
+    Templates are markdown with {field} substitutions, see FIELDS and
+    PART_FIELDS, {newline} for the project newline and {?field}...{/field}
+    for a part rendered only when the field is not empty. The heading
+    template gives chunk_heading, chunk templates use it as {heading}. It is
+    rendered without a module or source file, so it can only use the
+    fields in CHUNK_FIELDS.
+    """
+
+    TEMPLATES: Mapping[str, str] = dict()
+
+    def __init__(self, project):
+        self.newline = project.newline
+        namespace = {
+            "module_name": module_name,
+            "stripped_parts": stripped_parts,
+            "cxmeta_footer": cxmeta_footer,
+            "symbol_name": symbol_name,
+            "heading": self.render_heading,
+        }
+        style_name = type(self).__name__
+        # The heading is inlined where it is substituted, it is only
+        # rendered on its own for conditions and chunk_heading
+        heading = parse_template(
+            self.TEMPLATES.get("heading", ""),
+            self.newline,
+            fields=CHUNK_FIELDS,
+        )
+        fields = dict(FIELDS)
+        if (
+            len(heading) == 1
+            and heading[0][0] == "field"
+            and heading[0][1] in fields
+        ):
+            # A heading of one field is that field, nothing to render
+            fields["heading"] = fields[heading[0][1]]
+        self.renderers = dict()
+        for section in SECTIONS:
+            nodes = heading
+            if section != "heading":
+                nodes = parse_template(
+                    self.TEMPLATES.get(section, ""),
+                    self.newline,
+                    {"heading": heading},
+                    set(fields).union(PART_FIELDS),
+                )
+            self.renderers[section] = compile_template(
+                nodes,
+                namespace,
+                "{} {}".format(style_name, section),
+                fields,
+            )
+        # The compiled chunk function takes the arguments of render_chunk,
+        # the exporter calls it without going through a method
+        self.render_chunk = self.renderers["chunk"]
+
+    def render(self, section, module, source_file=None, chunk=None) -> str:
+        output: List[str] = list()
+        self.renderers[section](output, module, source_file, chunk)
+        return "".join(output)
+
+    def render_heading(self, module, source_file, chunk) -> str:
+        return self.render("heading", module, source_file, chunk)
+
+    def start_module(self, module: Module) -> str:
+        return self.render("start_module", module)
+
+    def end_module(self, module: Module) -> str:
+        return self.render("end_module", module)
+
+    def start_source_file(self, module: Module, source_file: Combiner) -> str:
+        return self.render("start_source_file", module, source_file)
+
+    def end_source_file(self, module: Module, source_file: Combiner) -> str:
+        return self.render("end_source_file", module, source_file)
+
+    def chunk(
+        self, module: Module, source_file: Combiner, chunk: Chunk
+    ) -> str:
+        return self.render("chunk", module, source_file, chunk)
+
+    def chunk_heading(self, chunk: Chunk) -> Optional[str]:
+        return self.render_heading(None, None, chunk) or None
+
+
+class ReadmeTemplateStyle(TemplateStyle):
+    TEMPLATES = {
+        "heading": "{names}",
+        "chunk": (
+            "{?heading}### {heading}{newline}{newline}{/heading}"
+            "{docs}"
+            "{?has_code}{newline}```c{newline}{code}{newline}```"
+            "{newline}{newline}{/has_code}"
+        ),
+    }
+
+
+class ProjectIndexTemplateStyle(TemplateStyle):
+    TEMPLATES = {
+        "heading": "{?last_name}`{last_name}` ({types}){/last_name}",
+        "start_module": "# {module_name}{newline}",
+        "end_module": "{footer}",
+        "start_source_file": (
+            "### {source_name}{newline}{newline}"
+            ":link: [{source_path}]({source_path}){newline}{newline}"
+        ),
+        "chunk": (
+            "{?heading}#### {heading}{newline}{newline}{/heading}"
+            "{docs}{newline}"
+            "{?code_stripped}~~~c{newline}{code_stripped}{newline}~~~"
+            "{newline}{newline}{/code_stripped}"
+        ),
+    }
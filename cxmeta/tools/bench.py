@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+import tempfile
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from docopt import docopt  # type: ignore
+
+from cxmeta import __version__
+from cxmeta.config.project import Project
+from cxmeta.pipeline.source_module import Module
+from cxmeta.pipeline.combiner import Combiner
+from cxmeta.pipeline.cxx_processor import CxxProcessor
+from cxmeta.pipeline.cxx_scanner import TOKENIZERS
+from cxmeta.pipeline.gfm_exporter import GfmExporter
+from cxmeta.pipeline.stream import Chunk, InputBuffer, InputDirectory
+from cxmeta.style.registry import STYLES
+from cxmeta.tools.corpus import COMMENT_UNIT, SHAPES, count_lines
+from cxmeta.tools.corpus import synthetic_header
+from cxmeta.tools.corpus import write_corpus
+
+STARTUP_MODULE = "cxmeta.tools.cli"
+# Milliseconds importing STARTUP_MODULE may take, test_startup enforces it
+STARTUP_BUDGET_MS = 60
+
+USAGE = """
+Usage:
+  {command} atoms [--units <units>]
+  {command} docs [--units <units>]
+  {command} render [--chunks <chunks> --style <style>]
+  {command} suite [options]
+  {command} startup [--runs <runs> --budget <ms>]
+
+  -h, --help                Show this screen.
+  --units <units>           Declarations to synthesize [default: 5000]
+  --chunks <chunks>         Chunks in the rendered module [default: 100000]
+  --style <style>           Style to render with [default: readme]
+  --shapes <shapes>         Comma separated corpus shapes [default: all]
+  --scale <scale>           Corpus size multiplier [default: 1.0]
+  --output <file>           Write the JSON report to a file
+  --runs <runs>             Interpreter starts to measure [default: 5]
+  --budget <ms>             Longest CLI import allowed [default: {budget}]
+
+""".format(command=os.path.basename(__file__), budget=STARTUP_BUDGET_MS)
+
+
+def bench_atoms(units: int):
+    """
+    Tokenize a synthetic header, measuring throughput and the memory held
+    by the materialized atom stream
+    """
+    project = Project()
+    module = Module(project, InputDirectory("."))
+    source = InputBuffer("bench-atoms", synthetic_header(units))
+
+    start = time.perf_counter()
+    atom_count = len(
+        CxxProcessor(project, module, source).process().stream().content
+    )
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    proc = CxxProcessor(project, module, source).process()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del proc
+
+    return {
+        "atoms": atom_count,
+        "seconds": elapsed,
+        "atoms_per_sec": atom_count / elapsed,
+        "bytes_per_atom": held / atom_count,
+    }
+
+
+class ReplayProcessor(object):
+    """Feeds pre-tokenized atoms to a combiner"""
+
+    def __init__(self, atoms):
+        self.atoms = atoms
+
+    def read(self):
+        return iter(self.atoms)
+
+
+def bench_docs(units: int):
+    """
+    Combine a comment heavy header from pre-tokenized atoms so the time is
+    dominated by normalizing doc lines and extracting their directives
+    """
+    project = Project()
+    module = Module(project, InputDirectory("."))
+    source = InputBuffer("bench-docs", synthetic_header(units, COMMENT_UNIT))
+    combiner = Combiner(project, module, source)
+    combiner.proc = ReplayProcessor(list(combiner.proc.read()))
+    start = time.perf_counter()
+    chunks = combiner.process().stream().content
+    elapsed = time.perf_counter() - start
+
+    doc_lines = sum(len(chunk.docs) for chunk in chunks)
+    return {
+        "chunks": len(chunks),
+        "doc_lines": doc_lines,
+        "directives": sum(len(chunk.directives) for chunk in chunks),
+        "seconds": elapsed,
+        "doc_lines_per_sec": doc_lines / elapsed,
+    }
+
+
+def synthetic_chunks(count: int):
+    chunks = list()
+    for i in range(count):
+        chunk = Chunk()
+        chunk.line_num = i * 4 + 1
+        chunk.docs = [
+            "Documentation for function_{}".format(i),
+            "\n",
+            "more text about (things) here",
+            "\n",
+        ]
+        chunk.code = ["int function_{}(int a, char *b);".format(i), "\n"]
+        chunk.names = ["function_{}".format(i)]
+        chunk.types = ["int", "char"]
+        chunks.append(chunk)
+    return chunks
+
+
+def bench_render(count: int, style: str):
+    """
+    Export one module of count chunks to a single output, measuring the
+    best time of a few runs and the peak memory allocated by one
+    """
+    with tempfile.TemporaryDirectory(prefix="cxmeta-bench-") as root:
+        config = {
+            "full_path": root,
+            "output_path": root,
+            "publish_single_file": True,
+            "output_file_name": "README.md",
+            "style": style,
+        }
+        project = Project(config=config)
+        module = Module(project, InputDirectory(root))
+        source = InputBuffer("bench-render.h", "")
+        combiner = Combiner(project, module, source)
+        module.files.append(combiner.load(synthetic_chunks(count)))
+
+        times = list()
+        for _ in range(3):
+            start = time.perf_counter()
+            GfmExporter(project).export_module(module)
+            times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        GfmExporter(project).export_module(module)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        output_bytes = os.path.getsize(os.path.join(root, "README.md"))
+
+    return {
+        "chunks": count,
+        "style": style,
+        "seconds": min(times),
+        "output_bytes": output_bytes,
+        "peak_alloc_bytes": peak,
+    }
+
+
+def peak_rss_kb() -> int:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak //= 1024
+    return peak
+
+
+def run_stage(stage: str, root: str, option: str):
+    """
+    Run one pipeline stage over the corpus in root, returning the elapsed
+    time and memory figures. Work that belongs to earlier stages is done
+    before the clock starts. The peak RSS of a process can't be reset, so
+    peak_rss_kb is cumulative and includes that setup, setup_rss_kb is the
+    peak before the stage and stage_rss_kb what the stage added on top.
+    """
+    with tempfile.TemporaryDirectory(prefix="cxmeta-bench-") as output_path:
+        return run_stage_in(stage, root, option, output_path)
+
+
+def run_stage_in(stage: str, root: str, option: str, output_path: str):
+    config = {
+        "full_path": root,
+        "output_path": output_path,
+        "include_extensions": [".h"],
+        "publish_single_file": True,
+        "output_file_name": "README.md",
+        "style": option if stage == "export" else "readme",
+        "tokenizer": option if stage == "tokenize" else "line",
+    }
+    project = Project(config=config)
+    module = Module(project, InputDirectory(root)).discover()
+    counts = {"files": len(module.files)}
+
+    if stage == "tokenize":
+        setup_rss = peak_rss_kb()
+        start = time.perf_counter()
+        counts["atoms"] = sum(
+            sum(1 for _ in combiner.proc.read()) for combiner in module.files
+        )
+        elapsed = time.perf_counter() - start
+    elif stage == "combine":
+        for combiner in module.files:
+            combiner.proc = ReplayProcessor(list(combiner.proc.read()))
+        setup_rss = peak_rss_kb()
+        start = time.perf_counter()
+        for combiner in module.files:
+            combiner.process()
+        elapsed = time.perf_counter() - start
+        counts["chunks"] = sum(
+            len(combiner.stream().content) for combiner in module.files
+        )
+    elif stage == "export":
+        module.process()
+        setup_rss = peak_rss_kb()
+        start = time.perf_counter()
+        GfmExporter(project).export_module(module)
+        elapsed = time.perf_counter() - start
+    else:
+        raise ValueError("Unknown stage '{}'".format(stage))
+
+    peak_rss = peak_rss_kb()
+    counts.update(
+        {
+            "seconds": elapsed,
+            "setup_rss_kb": setup_rss,
+            "peak_rss_kb": peak_rss,
+            "stage_rss_kb": peak_rss - setup_rss,
+        }
+    )
+    return counts
+
+
+def stages():
+    for tokenizer in TOKENIZERS:
+        yield "tokenize", tokenizer
+    yield "combine", ""
+    for style in STYLES:
+        yield "export", style
+
+
+def bench_suite(shapes, scale: float):
+    report = {
+        "cxmeta_version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": scale,
+        "corpora": dict(),
+    }
+    for shape in shapes:
+        with tempfile.TemporaryDirectory(prefix="cxmeta-corpus-") as root:
+            paths = write_corpus(shape, root, scale)
+            lines = count_lines(paths)
+            results = dict()
+            for stage, option in stages():
+                # Each stage runs in a fresh process so the peak RSS
+                # only covers that stage and the setup it needs
+                with ProcessPoolExecutor(max_workers=1) as executor:
+                    result = executor.submit(
+                        run_stage, stage, root, option
+                    ).result()
+                result["lines_per_sec"] = lines / result["seconds"]
+                name = "{}[{}]".format(stage, option) if option else stage
+                results[name] = result
+            report["corpora"][shape] = {
+                "files": len(paths),
+                "lines": lines,
+                "stages": results,
+            }
+    return report
+
+
+def import_time_us(module: str) -> int:
+    """
+    Cumulative import time of module in a fresh interpreter, as reported
+    by -X importtime
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    for line in proc.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1])
+    raise ValueError("No import time reported for {}".format(module))
+
+
+def bench_startup(runs: int, budget_ms: float):
+    """
+    Measure how long importing the command line tool takes, the best of
+    several runs is compared against the budget
+    """
+    times = [import_time_us(STARTUP_MODULE) for _ in range(runs)]
+    best_ms = min(times) / 1000.0
+    return {
+        "module": STARTUP_MODULE,
+        "runs": runs,
+        "best_ms": best_ms,
+        "worst_ms": max(times) / 1000.0,
+        "budget_ms": budget_ms,
+        "within_budget": best_ms <= budget_ms,
+    }
+
+
+def write_report(result, output):
+    json.dump(result, output, indent=2)
+    output.write("\n")
+
+
+def main():
+    args = docopt(USAGE)
+    if args["atoms"]:
+        result = bench_atoms(int(args["--units"]))
+    elif args["docs"]:
+        result = bench_docs(int(args["--units"]))
+    elif args["render"]:
+        result = bench_render(int(args["--chunks"]), args["--style"])
+    elif args["startup"]:
+        result = bench_startup(int(args["--runs"]), float(args["--budget"]))
+    else:
+        shapes = list(SHAPES)
+        if args["--shapes"] != "all":
+            shapes = args["--shapes"].split(",")
+        result = bench_suite(shapes, float(args["--scale"]))
+
+    if args["--output"]:
+        with open(args["--output"], "w") as output:
+            write_report(result, output)
+    else:
+        write_report(result, sys.stdout)
+    if not result.get("within_budget", True):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
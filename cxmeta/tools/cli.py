@@ -2,22 +2,40 @@
 import os
 import sys
 import logging
-import colorlog  # type: ignore
 from typing import Dict
 from docopt import docopt  # type: ignore
-from cxmeta.pipeline.builder import Builder
-from cxmeta.config.config_loader import ConfigLoader, VALID_SETTINGS
-from cxmeta.style.registry import STYLES
+from cxmeta.config.config_loader import (
+    ConfigLoader,
+    VALID_SETTINGS,
+    compile_config,
+)
+from cxmeta.style.registry import STYLES, STYLE_DESCRIPTIONS
 
 USAGE = """
 Usage:
-  {command}.py [options] <source_file_or_dir>
+  {command}.py [options] <source_file_or_dir>...
+  {command}.py [options] --manifest <file>
+  {command}.py [options] --merge <source_file_or_dir> <shard_file>...
 
   -h, --help                        Show this screen.
   --version                         Show the version
   --help-config                     Show configuration help
   --help-styles                     Show available styles
+  --compile-config                  Write a JSON snapshot of the config file
   -d, --debug                       Enable debug information
+  -j <jobs>, --jobs <jobs>          Worker processes, 0 for all cores
+  --cache                           Reuse results of unchanged files
+  --cache-path <dir>                Cache location shared by all projects
+  --manifest <file>                 Process the project roots listed in a file
+  --file-list <file>                Process the files listed in a manifest
+  --skip-unchanged                  Only rewrite outputs that changed
+  -w, --watch                       Update the outputs when sources change
+  --interval <seconds>              Watch polling interval [default: 0.5]
+  --metrics                         Record per stage and per file metrics
+  --slowest <count>                 Report the slowest files, implies metrics
+  --shard <i/N>                     Only process shard i of N, counted from 0
+  --shard-output <file>             Where the shard writes its chunks
+  --merge                           Render the outputs from shard files
 
 """.format(
     command=os.path.basename(__file__)
@@ -25,6 +43,7 @@ Usage:
 
 
 def configure_logging():
+    import colorlog  # type: ignore
 
     output = colorlog.StreamHandler()
     output.setLevel(logging.DEBUG)  # \033[1m
@@ -40,45 +59,150 @@ def configure_logging():
     return logger
 
 
-def main():
-    log = configure_logging()
+def process_batch(log, args, roots, settings):
+    """Process many projects sharing one worker pool, returns the exit code"""
+    from cxmeta.config.batch import Batch, load_manifest
 
-    args = docopt(USAGE)
-    debug = args.get("--debug", True)
-    if debug:
-        for k, v in args.items():
-            log.debug("{} {}".format(k, v))
+    if args.get("--manifest"):
+        roots = load_manifest(args["--manifest"])
+    statuses = Batch(roots, settings).process()
+    for status in statuses:
+        log.info("project-status: {}".format(status))
+    failed = sum(1 for status in statuses if not status.success)
+    log.info("batch: {} projects, {} failed".format(len(statuses), failed))
+    return 1 if failed else 0
 
+
+def show_help(log, args):
     # TODO: broken
     if args.get("--help-config"):
         for k, v in VALID_SETTINGS.items():
             log.info("{} {}".format(k, v))
             sys.exit(1)
     if args.get("--help-styles"):
-        for k, v in STYLES.items():
-            log.info("{} {}".format(k, v))
-            sys.exit(1)
-
-    source_path = args["<source_file_or_dir>"]
-    full_path = os.path.abspath(source_path)
-
+        for name in STYLES:
+            description = STYLE_DESCRIPTIONS.get(name, "")
+            log.info("{} {}".format(name, description))
+        sys.exit(1)
+
+
+def command_settings(args) -> Dict:
+    """Settings given on the command line, they override the project configs"""
+    settings: Dict = dict()
+    if args.get("--jobs") is not None:
+        settings["jobs"] = int(args["--jobs"])
+    if args.get("--cache"):
+        settings["cache"] = True
+    if args.get("--cache-path"):
+        settings["cache_path"] = os.path.abspath(args["--cache-path"])
+    if args.get("--skip-unchanged"):
+        settings["skip_unchanged"] = True
+    if args.get("--file-list"):
+        settings["file_list"] = args["--file-list"]
+    if args.get("--metrics") or args.get("--slowest"):
+        settings["metrics"] = True
+    return settings
+
+
+def write_compiled_config(log, full_path):
+    config_path = ConfigLoader.search_path(full_path)
+    if config_path is None:
+        sys.exit("no config file found for {}".format(full_path))
+    log.info("wrote {}".format(compile_config(config_path)))
+
+
+def build_project(log, full_path, settings, debug):
     # Load the project config, combine with arguments
     config = ConfigLoader(full_path).doc
     settings_dict: Dict[str, Dict] = config.setdefault("settings", dict())
     settings_dict.setdefault("debug", debug)
+    config.update(settings)
 
     log.info("project-config:")
     for k, v in config.items():
         log.info("  {}: {}".format(k, v))
 
+    # The pipeline is only imported once there is a project to process
+    from cxmeta.pipeline.builder import Builder
+
     # Build the project object
-    project = Builder().build_from_config(config)
+    return Builder().build_from_config(config)
+
+
+def watch_project(log, args, project):
+    from cxmeta.config.workspace import Workspace
+
+    log.info("watching {}, interrupt to stop".format(project.full_path))
+    workspace = Workspace(project)
+    try:
+        workspace.watch(
+            float(args["--interval"]),
+            lambda status: log.info("project-status: {}".format(status)),
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+def process_shard(log, args, project):
+    from cxmeta.config.shard import Shard, merge_shards, parse_shard
+
+    if args.get("--merge"):
+        status = merge_shards(project, args["<shard_file>"])
+    else:
+        try:
+            index, count = parse_shard(args["--shard"])
+        except ValueError as e:
+            sys.exit(str(e))
+        shard = Shard(project, index, count)
+        status = shard.process(args.get("--shard-output"))
+    log.info("project-status: {}".format(status))
+
+
+def process_project(log, args, project):
     status = project.process()
     log.info("project-status: {}".format(status))
+    slowest = args.get("--slowest")
+    if slowest and status.metrics is not None:
+        log.info("slowest-files:")
+        for file_metrics in status.metrics.slowest(int(slowest)):
+            log.info("  {}".format(file_metrics))
     # TODO: convert to attrs
     # for k, v in status.items():
     #   print("  {}: {}".format(k, v))
 
 
+def main():
+    log = configure_logging()
+
+    args = docopt(USAGE)
+    debug = args.get("--debug", True)
+    if debug:
+        for k, v in args.items():
+            log.debug("{} {}".format(k, v))
+    show_help(log, args)
+    settings = command_settings(args)
+
+    roots = args["<source_file_or_dir>"]
+    if isinstance(roots, str):
+        roots = [roots]
+    if args.get("--manifest") or len(roots) > 1:
+        if args.get("--watch"):
+            sys.exit("--watch only supports a single project")
+        sys.exit(process_batch(log, args, roots, settings))
+
+    full_path = os.path.abspath(roots[0])
+    if args.get("--compile-config"):
+        write_compiled_config(log, full_path)
+        return
+
+    project = build_project(log, full_path, settings, debug)
+    if args.get("--watch"):
+        watch_project(log, args, project)
+    elif args.get("--shard") or args.get("--merge"):
+        process_shard(log, args, project)
+    else:
+        process_project(log, args, project)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,107 @@
+import os
+from typing import List, Mapping, Tuple
+
+MIXED_UNIT = """
+// Documentation for function_{i}
+// more text about (things) here
+int function_{i}(int a, char *b);
+
+/* Struct {i} */
+typedef struct S{i} {{
+    int a; // field
+}} S{i};
+#define MACRO_{i}(x) (x)
+"""
+
+COMMENT_UNIT = """
+// ..class:: cxm_function
+// ## function_{i}
+//
+// A longer description of function_{i} that spans several lines so that
+// documentation processing dominates the work done for this header,
+// including `inline code` and [links](https://example.com/{i}).
+//
+//     indented example(code, {i});
+//
+// Trailing notes for function_{i} /* with an embedded comment */
+// that continue over multiple line comments.
+void function_{i}(int a);
+"""
+
+MACRO_UNIT = """
+// Macro {i}
+#define MACRO_{i}(x, y) \\
+    do {{ \\
+        if ((x) > (y)) {{ \\
+            swap_{i}(&(x), &(y)); \\
+        }} \\
+    }} while (0)
+#define CONSTANT_{i} ({i} << 2)
+"""
+
+NESTED_UNIT = """
+// Nested function {i}
+static inline int nested_{i}(int n) {{
+    for (int a = 0; a < n; ++a) {{
+        for (int b = 0; b < a; ++b) {{
+            if ((a + b) % 3 == 0) {{
+                while (b > 0) {{
+                    switch (b) {{
+                        case 1: {{ n += (a * b); break; }}
+                        default: {{ n -= (a - b); }}
+                    }}
+                    --b;
+                }}
+            }}
+        }}
+    }}
+    return n;
+}}
+"""
+
+
+def synthetic_header(units: int, unit: str = MIXED_UNIT) -> str:
+    return "".join(unit.format(i=i) for i in range(units))
+
+
+# Corpus shapes: (unit text, files, units per file), both counts are
+# multiplied by the scale when the corpus is written
+SHAPES: Mapping[str, Tuple[str, int, int]] = {
+    "comment_heavy": (COMMENT_UNIT, 20, 200),
+    "macro_heavy": (MACRO_UNIT, 20, 200),
+    "nested_blocks": (NESTED_UNIT, 20, 100),
+    "huge_file": (MIXED_UNIT, 1, 10000),
+    "many_tiny_files": (MIXED_UNIT, 1000, 1),
+}
+
+
+def scaled(count: int, scale: float) -> int:
+    return max(1, int(count * scale))
+
+
+def write_corpus(shape: str, root: str, scale: float = 1.0) -> List[str]:
+    """
+    Write the headers of a corpus shape into root, returning their paths
+    """
+    unit, files, units = SHAPES[shape]
+    if files > 1:
+        files = scaled(files, scale)
+    else:
+        units = scaled(units, scale)
+
+    os.makedirs(root, exist_ok=True)
+    paths = list()
+    for i in range(files):
+        path = os.path.join(root, "{}_{:05d}.h".format(shape, i))
+        with open(path, "w") as output:
+            output.write(synthetic_header(units, unit))
+        paths.append(path)
+    return paths
+
+
+def count_lines(paths: List[str]) -> int:
+    lines = 0
+    for path in paths:
+        with open(path, "r") as input_file:
+            lines += sum(1 for _ in input_file)
+    return lines
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+from docopt import docopt  # type: ignore
+
+from cxmeta.config.config_loader import ConfigLoader
+from cxmeta.config.workspace import Workspace
+from cxmeta.pipeline.builder import Builder
+from cxmeta.pipeline.gfm_exporter import GfmExporter
+
+HOST = "127.0.0.1"
+DEFAULT_PORT = 8737
+
+USAGE = """
+Usage:
+  {command} serve [--port <port>] [options]
+  {command} render <path> [--project <dir>] [--port <port>]
+  {command} status [--port <port>]
+  {command} shutdown [--port <port>]
+
+  -h, --help                Show this screen.
+  --port <port>             Local port of the server [default: {port}]
+  --project <dir>           Project the path belongs to
+  -j <jobs>, --jobs <jobs>  Worker processes, 0 for all cores
+  --cache                   Reuse results of unchanged files
+
+""".format(command=os.path.basename(__file__), port=DEFAULT_PORT)
+
+
+def find_project_path(path):
+    """
+    The project a path belongs to, the directory of the nearest config
+    file or the directory itself
+    """
+    directory = path if os.path.isdir(path) else os.path.dirname(path)
+    config_path = ConfigLoader.search_path(directory)
+    if config_path is None:
+        return directory
+    return os.path.dirname(config_path)
+
+
+class ProjectServer(object):
+    """
+    Holds loaded projects in memory and renders their modules or single
+    sources on request.
+
+    Every project is kept in a Workspace, before answering a request the
+    workspace is updated so sources changed on disk are processed again,
+    like the watch mode of the command line tool. Outputs are only rendered
+    in memory, the server never writes to the projects it loads.
+    Requests are served one at a time.
+    """
+
+    def __init__(self, settings=None):
+        self.log = logging.getLogger("cxmeta")
+        self.settings = settings or dict()
+        self.workspaces: Dict[str, Workspace] = dict()
+        self.lock = threading.Lock()
+
+    def workspace(self, project_path) -> Workspace:
+        project_path = os.path.abspath(project_path)
+        workspace = self.workspaces.get(project_path)
+        if workspace is None:
+            config = ConfigLoader(project_path).doc
+            config.update(self.settings)
+            project = Builder().build_from_config(config)
+            workspace = Workspace(project, write_outputs=False)
+            self.log.info("loading project {}".format(project_path))
+            workspace.load()
+            self.workspaces[project_path] = workspace
+        else:
+            workspace.update()
+        return workspace
+
+    def render(self, path, project_path=None):
+        """Markdown of a module, or of one source when path is a file"""
+        path = os.path.abspath(path)
+        with self.lock:
+            workspace = self.workspace(project_path or find_project_path(path))
+            module = workspace.module
+            exporter = GfmExporter(workspace.project)
+            # Nothing is written so there is no symbol index to collect
+            exporter.symbols = None
+            output = list()
+            if os.path.isdir(path):
+                exporter.output_file_path = exporter.output_path_for(module)
+                # No per-file outputs, only the module output is rendered
+                exporter.render_module(output, module, set())
+            else:
+                for source_file in module.files:
+                    if source_file.source.full_path == path:
+                        exporter.source_output_path = (
+                            exporter.source_output_path_for(source_file)
+                        )
+                        exporter.export_source_file_inner(
+                            output, module, source_file
+                        )
+                        break
+                else:
+                    raise FileNotFoundError(
+                        "{} is not a source of project {}".format(
+                            path, workspace.project.full_path
+                        )
+                    )
+            return {
+                "project": workspace.project.full_path,
+                "markdown": exporter.join_output(output),
+            }
+
+    def status(self):
+        with self.lock:
+            return {
+                "projects": {
+                    path: {"files": len(workspace.module.files)}
+                    for path, workspace in self.workspaces.items()
+                }
+            }
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON over HTTP: GET /status, POST /render with path and optionally
+    project, POST /shutdown
+
+    Only requests naming the loopback address as their Host are served, so
+    pages loaded in a browser can not reach the server through a rebound
+    DNS name. POST bodies must be sent as application/json, which a page
+    can not do without a CORS preflight the server never answers.
+    """
+
+    server_version = "cxmeta"
+
+    def log_message(self, format, *args):
+        logging.getLogger("cxmeta").debug(format % args)
+
+    def reply(self, code, body):
+        data = json.dumps(body).encode("utf8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def rejected(self, post=False) -> bool:
+        """Reply with an error and return True when the request is refused"""
+        port = self.server.server_port
+        hosts = {"{}:{}".format(host, port) for host in (HOST, "localhost")}
+        if self.headers.get("Host") not in hosts:
+            self.reply(403, {"success": False, "message": "bad_host"})
+            return True
+        if post and self.headers.get_content_type() != "application/json":
+            self.reply(415, {"success": False, "message": "not_json"})
+            return True
+        return False
+
+    def do_GET(self):
+        if self.rejected():
+            return
+        if self.path == "/status":
+            self.reply(200, dict(success=True, **self.server.cxm.status()))
+        else:
+            self.reply(404, {"success": False, "message": "not_found"})
+
+    def do_POST(self):
+        if self.rejected(post=True):
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if self.path == "/render":
+                result = self.server.cxm.render(
+                    request["path"], request.get("project")
+                )
+            elif self.path == "/shutdown":
+                result = dict()
+                threading.Thread(target=self.server.shutdown).start()
+            else:
+                self.reply(404, {"success": False, "message": "not_found"})
+                return
+        except (OSError, KeyError, ValueError) as e:
+            self.reply(400, {"success": False, "message": str(e)})
+            return
+        except Exception as e:
+            logging.getLogger("cxmeta").exception("request failed")
+            self.reply(500, {"success": False, "message": repr(e)})
+            return
+        self.reply(200, dict(success=True, **result))
+
+
+def create_server(port=DEFAULT_PORT, settings=None) -> ThreadingHTTPServer:
+    """Create the server, bound to the loopback interface only"""
+    server = ThreadingHTTPServer((HOST, port), RequestHandler)
+    server.cxm = ProjectServer(settings)
+    return server
+
+
+def request(port, path, payload=None):
+    """Send a request to a running server and return the decoded reply"""
+    url = "http://{}:{}{}".format(HOST, port, path)
+    data = None
+    headers = dict()
+    if payload is not None:
+        data = json.dumps(payload).encode("utf8")
+        headers["Content-Type"] = "application/json"
+    try:
+        with urlopen(Request(url, data=data, headers=headers)) as response:
+            return json.load(response)
+    except HTTPError as e:
+        return json.load(e)
+
+
+def serve(args, port):
+    logging.basicConfig(level=logging.INFO)
+    settings = dict()
+    if args["--jobs"] is not None:
+        settings["jobs"] = int(args["--jobs"])
+    if args["--cache"]:
+        settings["cache"] = True
+    server = create_server(port, settings)
+    logging.getLogger("cxmeta").info(
+        "serving on {}:{}".format(HOST, server.server_port)
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+
+def main():
+    args = docopt(USAGE)
+    port = int(args["--port"])
+    if args["serve"]:
+        serve(args, port)
+    elif args["render"]:
+        payload = {"path": os.path.abspath(args["<path>"])}
+        if args["--project"]:
+            payload["project"] = os.path.abspath(args["--project"])
+        reply = request(port, "/render", payload)
+        if not reply["success"]:
+            sys.exit(reply["message"])
+        print(reply["markdown"], end="")
+    elif args["status"]:
+        print(json.dumps(request(port, "/status"), indent=2))
+    elif args["shutdown"]:
+        request(port, "/shutdown", dict())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import subprocess
 from typing import List
 from setuptools import setup, find_packages  # type: ignore
+from cxmeta import __version__
 
 
 DESCRIPTION = "A python CLI and library to extract \
@@ -32,13 +33,18 @@ def optional_git_version():
 
 setup(
     name="cxmeta",
-    version="1.0.0-alpha-" + optional_git_version(),
+    version=__version__ + "-" + optional_git_version(),
     packages=find_packages(),
     scripts=["cxmeta/tools/cli.py"],
     install_requires=["docopt", "docutils",],
     package_data=
     {"": ["*.md", "*.rst"]},
-    entry_points={"console_scripts": ["cxmeta=cxmeta.tools.cli:main"],},
+    entry_points={
+        "console_scripts": [
+            "cxmeta=cxmeta.tools.cli:main",
+            "cxmeta-server=cxmeta.tools.server:main",
+        ],
+    },
     author="Jacob Repp",
     author_email="jacobrepp@gmail.com",
     description=DESCRIPTION,
@@ -1,7 +1,10 @@
+import os
+import tempfile
 import unittest
 
 from cxmeta.pipeline.source_module import module_name, Module
 from cxmeta.pipeline.combiner import Combiner
+from cxmeta.pipeline.cxx_processor import CxxProcessor
 from cxmeta.pipeline.stream import (
     Stream,
     Processor,
@@ -51,6 +54,32 @@ class TestBasics(unittest.TestCase):
         self.assertEqual(module.debug_files, True)
         module.process()
 
+    def test_parallel_module(self):
+        def chunk_docs(jobs):
+            project = Project(
+                config={
+                    "full_path": root,
+                    "include_extensions": [".h"],
+                    "jobs": jobs,
+                }
+            )
+            module = Module(project, InputDirectory(root)).process()
+            return [
+                (
+                    c.source.full_path,
+                    [chunk.docs for chunk in c.stream_data.content],
+                )
+                for c in module.files
+            ]
+
+        with tempfile.TemporaryDirectory() as root:
+            for i in range(6):
+                with open(os.path.join(root, "h{}.h".format(i)), "w") as f:
+                    f.write("// Doc {i}\nvoid f{i}();\n".format(i=i))
+            serial = chunk_docs(1)
+            self.assertEqual(6, len(serial))
+            self.assertEqual(serial, chunk_docs(3))
+
     def test_source_file(self):
         project = Project()
         module = Module(project, FakeInputDirectory("/"))
@@ -60,12 +89,17 @@ class TestBasics(unittest.TestCase):
 
     def test_stream(self):
         s = Stream("source-name")
-        s.append(Atom(1, 10, "test"))
+        s.append(Atom(1, 10, CxxProcessor.CONTENT, "test"))
         atom = next(s.read())
         self.assertIsNotNone(atom)
         self.assertEqual(atom.line_num, 1)
         self.assertEqual(atom.pos, 10)
-        self.assertEqual(atom.data, "test")
+        self.assertEqual(atom.kind, CxxProcessor.CONTENT)
+        self.assertEqual(atom.value, "test")
+        # Equal atoms hash alike so they still work in sets and dicts
+        same = Atom(1, 10, CxxProcessor.CONTENT, "test")
+        self.assertEqual(atom, same)
+        self.assertEqual(1, len({atom, same}))
 
     def test_processor_type(self):
         str_proc = FakeStrProcessor(Project(), "str-foo")
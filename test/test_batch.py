@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+from cxmeta.config.batch import Batch, load_manifest
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root = tempfile.TemporaryDirectory()
+        self.projects = list()
+        for project in ("liba", "libb"):
+            path = os.path.join(self.root.name, project)
+            os.makedirs(path)
+            for name in ("a.h", "b.h"):
+                with open(os.path.join(path, name), "w") as f:
+                    f.write(
+                        "// {0} {1}\nvoid {1}();\n".format(project, name[0])
+                    )
+            self.projects.append(path)
+
+    def tearDown(self) -> None:
+        self.root.cleanup()
+
+    def test_batch(self):
+        missing = os.path.join(self.root.name, "missing")
+        settings = {
+            "jobs": 2,
+            "cache": True,
+            "cache_path": os.path.join(self.root.name, "cache"),
+        }
+        roots = self.projects + [missing]
+        statuses = Batch(roots, settings).process()
+        self.assertEqual(
+            [True, True, False], [status.success for status in statuses]
+        )
+        self.assertEqual(missing, statuses[2].props["full_path"])
+        self.assertEqual(2, statuses[0].props["cache_misses"])
+        for project in self.projects:
+            with open(os.path.join(project, "README.md")) as f:
+                self.assertIn(os.path.basename(project) + " b", f.read())
+
+        statuses = Batch(self.projects, settings).process()
+        self.assertEqual(
+            [2, 2], [status.props["cache_hits"] for status in statuses]
+        )
+        # Both projects share one cache directory
+        self.assertEqual(4, len(os.listdir(settings["cache_path"])))
+
+    def test_export_failure(self):
+        # An invalid style is only found when the project is exported
+        with open(os.path.join(self.projects[1], ".cxmeta.yaml"), "w") as f:
+            f.write("style: missing\n")
+        statuses = Batch(self.projects).process()
+        self.assertEqual(
+            [True, False], [status.success for status in statuses]
+        )
+        self.assertIn("missing", statuses[1].props["error"])
+
+    def test_process_failure(self):
+        # Not utf8, the file fails while the files of both projects are
+        # processed together
+        with open(os.path.join(self.projects[1], "b.h"), "wb") as f:
+            f.write(b"// caf\xe9\nvoid b();\n")
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                statuses = Batch(self.projects, {"jobs": jobs}).process()
+                self.assertEqual(
+                    [True, False], [status.success for status in statuses]
+                )
+                # The retry of the healthy project adds every chunk once
+                with open(os.path.join(self.projects[0], "README.md")) as f:
+                    output = f.read()
+                self.assertEqual(1, output.count("liba a"))
+                self.assertEqual(1, output.count("liba b"))
+
+    def test_shared_cache(self):
+        batch = Batch(self.projects, {"cache": True})
+        paths = {batch.load_project(root).cache.path for root in self.projects}
+        self.assertEqual({batch.cache_path}, paths)
+
+    def test_manifest(self):
+        manifest = os.path.join(self.root.name, "projects.txt")
+        with open(manifest, "w") as f:
+            f.write("# libraries\nliba\n\nlibb\n")
+        self.assertEqual(self.projects, load_manifest(manifest))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import tempfile
+import unittest
+
+from cxmeta.tools.bench import bench_docs, bench_render, run_stage, stages
+from cxmeta.tools.corpus import SHAPES, count_lines, write_corpus
+
+
+class TestBench(unittest.TestCase):
+    def test_corpus_shapes(self):
+        for shape in SHAPES:
+            with tempfile.TemporaryDirectory() as root:
+                paths = write_corpus(shape, root, 0.01)
+                self.assertTrue(len(paths) > 0)
+                self.assertTrue(count_lines(paths) > 0)
+
+    def test_stages(self):
+        with tempfile.TemporaryDirectory() as root:
+            write_corpus("many_tiny_files", root, 0.01)
+            for stage, option in stages():
+                result = run_stage(stage, root, option)
+                self.assertEqual(10, result["files"])
+                self.assertTrue(result["seconds"] > 0)
+                self.assertTrue(result["peak_rss_kb"] > 0)
+                self.assertEqual(
+                    result["peak_rss_kb"],
+                    result["setup_rss_kb"] + result["stage_rss_kb"],
+                )
+
+    def test_docs(self):
+        result = bench_docs(10)
+        self.assertEqual(10, result["chunks"])
+        self.assertEqual(10, result["directives"])
+
+    def test_render(self):
+        result = bench_render(10, "readme")
+        self.assertTrue(result["output_bytes"] > 0)
+        self.assertTrue(result["peak_alloc_bytes"] > 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+
+from cxmeta.config.project import Project
+from cxmeta.config.config_loader import ConfigLoader
+from cxmeta.pipeline import cache
+from cxmeta.pipeline.stream import InputFile
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root = tempfile.TemporaryDirectory()
+        for name in ("a.h", "b.h"):
+            self.write(name, "// Doc for {0}\nvoid {0}();\n".format(name[0]))
+
+    def tearDown(self) -> None:
+        self.root.cleanup()
+
+    def write(self, name, text):
+        with open(os.path.join(self.root.name, name), "w") as f:
+            f.write(text)
+
+    def process(self, **settings):
+        config = ConfigLoader(self.root.name).default_config()
+        config["cache"] = True
+        config.update(settings)
+        status = Project(config=config).process()
+        with open(os.path.join(self.root.name, "README.md")) as f:
+            return status, f.read()
+
+    def test_warm_run(self):
+        status, cold = self.process()
+        self.assertEqual(0, status.props["cache_hits"])
+        self.assertEqual(2, status.props["cache_misses"])
+
+        status, warm = self.process()
+        self.assertEqual(2, status.props["cache_hits"])
+        self.assertEqual(0, status.props["cache_misses"])
+        self.assertEqual(cold, warm)
+
+    def test_settings(self):
+        self.process()
+        # Settings that don't change the chunks still hit
+        status, _ = self.process(
+            skip_unchanged=True,
+            metrics=True,
+            write_jobs=2,
+            symbol_index="symbols.json",
+            cross_reference=True,
+            name="renamed",
+        )
+        self.assertEqual(2, status.props["cache_hits"])
+        status, _ = self.process(tokenizer="buffer")
+        self.assertEqual(0, status.props["cache_hits"])
+
+    def test_changed_file(self):
+        self.process()
+        self.write("b.h", "// Changed doc\nvoid b();\n")
+        status, output = self.process()
+        self.assertEqual(1, status.props["cache_hits"])
+        self.assertEqual(1, status.props["cache_misses"])
+        self.assertIn("Changed doc", output)
+
+    def test_format_change(self):
+        self.process()
+        previous = cache.CACHE_FORMAT
+        cache.CACHE_FORMAT = previous + 1
+        try:
+            status, _ = self.process()
+        finally:
+            cache.CACHE_FORMAT = previous
+        self.assertEqual(0, status.props["cache_hits"])
+
+    def test_failed_put(self):
+        path = os.path.join(self.root.name, "cache")
+        parse_cache = cache.ParseCache(path, dict())
+        source = InputFile(os.path.join(self.root.name, "a.h"))
+        with self.assertRaises(AttributeError):
+            parse_cache.put(source, [object()])
+        self.assertEqual([], os.listdir(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
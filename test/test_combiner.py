@@ -97,6 +97,20 @@ fold_lines = r"""
 void some_function();
 """
 
+directives = """
+// ..class:: cxm_function
+// .. image:: diagram.png  Diagram
+//    :width: 200
+//    :nowrap:
+//
+//    Caption text
+//      continued
+// .. _target: https://example.com
+// .. A comment
+// Done
+void drawn();
+"""
+
 
 class TestCombiner(unittest.TestCase):
     def setUp(self) -> None:
@@ -123,6 +137,20 @@ class TestCombiner(unittest.TestCase):
             self.assertTrue(len(chunk.code) > 0)
             self.assertTrue(len(chunk.docs) > 0)
 
+    def test_streaming(self):
+        combiner = Combiner(
+            self.project,
+            self.module,
+            InputBuffer("streaming", two_chunks * 100),
+        )
+        reader = combiner.read()
+        chunk = next(reader)
+        self.assertIn("function_one", chunk.names)
+        # Only the lines up to the end of the first chunk have been read
+        self.assertTrue(combiner.proc.line_num < 10)
+        self.assertEqual(199, len(list(reader)))
+        self.assertTrue(combiner.stream_data.is_empty())
+
     def test_combine_three_styles(self):
         # self.project.config['debug_chunks'] = True
         # self.project.config['debug_atoms'] = True
@@ -169,6 +197,37 @@ class TestCombiner(unittest.TestCase):
             ],
         )
 
+    def test_directives(self):
+        combiner = self.process("directives", directives)
+        chunk = next(combiner.stream_data.read())
+        self.assertEqual(
+            {
+                "class": {
+                    "arguments": ["cxm_function"],
+                    "options": {},
+                    "content": [],
+                },
+                "image": {
+                    "arguments": ["diagram.png", "Diagram"],
+                    "options": {"width": "200", "nowrap": ""},
+                    "content": ["Caption text", "  continued"],
+                },
+            },
+            chunk.directives,
+        )
+        self.assertIn("   :width: 200", chunk.docs)
+
+    def test_doc_tabs(self):
+        combiner = self.process("doc_tabs", "// a\tb\n//\tc\nint x;\n")
+        chunk = next(combiner.stream_data.read())
+        # Tabs are expanded to the columns of the source lines
+        self.assertEqual(["a    b", "\n", " c", "\n"], chunk.docs)
+
+        # Text after a tab earlier on the line starts at its expanded column
+        combiner = self.process("doc_tabs_after", "// a\tb // c\td\nint x;\n")
+        chunk = next(combiner.stream_data.read())
+        self.assertEqual("a    b // c  d\n", "".join(chunk.docs))
+
     def test_md_link(self):
         combiner = self.process(
             "link_text", "// [A link](https://wheredoesitgo.com/index.html)"
@@ -31,10 +31,8 @@ multiline_function_c_style = r"""
 def next_value(i):
     while True:
         atom = next(i)
-        atom_type = atom.data.get("type")
-        value = atom.data.get("value")
-        if atom_type == r"content" and value is not None:
-            return value
+        if atom.kind == CxxProcessor.CONTENT and atom.value is not None:
+            return atom.value
 
 
 class TestComments(unittest.TestCase):
@@ -52,7 +50,7 @@ class TestComments(unittest.TestCase):
         i = comments.process().stream().read()
         atom = next(i)
         self.assertEqual(type(atom), Atom)
-        self.assertEqual(atom.data["type"], "newline")
+        self.assertEqual(atom.kind, CxxProcessor.NEWLINE)
 
     def test_before_and_after_empty(self):
         self.project.config["debug_atoms"] = True
@@ -0,0 +1,67 @@
+import os
+import json
+import tempfile
+import unittest
+
+from cxmeta.config.config_loader import (
+    CONFIG_NAME,
+    ConfigLoader,
+    compile_config,
+    file_stamp,
+    read_config,
+    snapshot_path,
+)
+
+
+class TestConfigLoader(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root = tempfile.TemporaryDirectory()
+        self.config_path = os.path.join(self.root.name, CONFIG_NAME)
+        self.write("style: project_index\n")
+
+    def tearDown(self) -> None:
+        self.root.cleanup()
+
+    def write(self, text, mtime_ns=None):
+        with open(self.config_path, "w") as f:
+            f.write(text)
+        if mtime_ns is not None:
+            os.utime(self.config_path, ns=(mtime_ns, mtime_ns))
+
+    def test_search_path(self):
+        nested = os.path.join(self.root.name, "a", "b", "c")
+        os.makedirs(os.path.join(nested, "d"))
+        self.assertEqual(self.config_path, ConfigLoader.search_path(nested))
+        # The search is bounded
+        self.assertIsNone(ConfigLoader.search_path(os.path.join(nested, "d")))
+
+    def test_memo(self):
+        doc = read_config(self.config_path)
+        self.assertEqual({"style": "project_index"}, doc)
+        doc["style"] = "changed"
+        self.assertEqual(
+            "project_index", read_config(self.config_path)["style"]
+        )
+
+        self.write("style: readme\n", mtime_ns=10**9)
+        self.assertEqual("readme", read_config(self.config_path)["style"])
+
+    def test_snapshot(self):
+        path = compile_config(self.config_path)
+        self.assertEqual(snapshot_path(self.config_path), path)
+        with open(path) as f:
+            self.assertEqual({"style": "project_index"}, json.load(f)["doc"])
+
+        # A matching snapshot is read instead of the YAML file
+        stamp = list(file_stamp(self.config_path))
+        with open(path, "w") as f:
+            json.dump({"stamp": stamp, "doc": {"style": "snapshot"}}, f)
+        self.assertEqual("snapshot", ConfigLoader(self.root.name).doc["style"])
+
+        # A stale snapshot is ignored
+        self.write("style: readme\n", mtime_ns=2 * 10**9)
+        self.assertEqual("readme", read_config(self.config_path)["style"])
+
+
+if __name__ == "__main__":
+    unittest.main()
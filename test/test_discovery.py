@@ -0,0 +1,85 @@
+import os
+import json
+import tempfile
+import unittest
+
+from cxmeta.config.project import Project
+from cxmeta.config.config_loader import ConfigLoader
+from cxmeta.pipeline.source_module import Module
+
+
+class TestDiscovery(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root = tempfile.TemporaryDirectory()
+        for name in (
+            "a.h",
+            "b.h",
+            "notes.txt",
+            "gen/c.h",
+            "inc/d.h",
+            "inc/d_test.h",
+            "inc/deep/e.h",
+        ):
+            self.write(name, "// Doc\nvoid {}();\n".format(name[-3]))
+
+    def tearDown(self) -> None:
+        self.root.cleanup()
+
+    def write(self, name, text):
+        full_path = os.path.join(self.root.name, name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w") as f:
+            f.write(text)
+
+    def config(self, **settings):
+        config = ConfigLoader(self.root.name).default_config()
+        config["include_paths"] = ["inc", "deep"]
+        config.update(settings)
+        return config
+
+    def discover(self, **settings):
+        project = Project(config=self.config(**settings))
+        module = Module(project, project.input_source()).discover()
+        return [
+            os.path.relpath(c.source.full_path, self.root.name)
+            for c in module.files
+        ]
+
+    def test_directory_order(self):
+        self.assertEqual(
+            ["a.h", "b.h", "inc/d.h", "inc/d_test.h", "inc/deep/e.h"],
+            self.discover(),
+        )
+
+    def test_exclude_paths(self):
+        self.assertEqual(
+            ["a.h", "b.h", "inc/d.h"],
+            self.discover(exclude_paths=["*_test.h", "inc/deep"]),
+        )
+
+    def test_file_list(self):
+        manifest = os.path.join(self.root.name, "files.txt")
+        with open(manifest, "w") as f:
+            f.write("# generated\ngen/c.h\n\nb.h\nnotes.txt\nb.h\n")
+        self.assertEqual(["gen/c.h", "b.h"], self.discover(file_list=manifest))
+
+    def test_compile_commands(self):
+        manifest = os.path.join(self.root.name, "compile_commands.json")
+        with open(manifest, "w") as f:
+            json.dump(
+                [
+                    {"directory": "inc", "file": "d.h"},
+                    {"directory": self.root.name, "file": "a.h"},
+                ],
+                f,
+            )
+        project = Project(config=self.config(file_list=manifest))
+        module = project.load_module()
+        self.assertEqual(
+            ["d.h", "a.h"],
+            [os.path.basename(c.source.full_path) for c in module.files],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
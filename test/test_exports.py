@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+
+from cxmeta.config.project import Project
+from cxmeta.config.config_loader import ConfigLoader
+from cxmeta.pipeline.exports import export_configs
+from cxmeta.pipeline.gfm_exporter import GfmExporter
+from cxmeta.tools.corpus import MIXED_UNIT, synthetic_header
+from test.test_template import read_outputs
+
+
+def exports(output_path):
+    return [
+        "readme",
+        {"style": "project_index", "output_file_name": "INDEX.md"},
+        {
+            "style": "project_index",
+            "publish_single_file": False,
+            "output_path": os.path.join(output_path, "index"),
+        },
+    ]
+
+
+class TestExports(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.root.name, "module")
+        os.makedirs(self.source)
+        for name in ("a.h", "b.h"):
+            with open(os.path.join(self.source, name), "w") as f:
+                f.write(synthetic_header(3, MIXED_UNIT))
+
+    def tearDown(self) -> None:
+        self.root.cleanup()
+
+    def project(self, output, **settings):
+        config = ConfigLoader(self.source).default_config()
+        config["output_path"] = os.path.join(self.root.name, output)
+        config.update(settings)
+        return Project(config=config)
+
+    def outputs(self, output):
+        return read_outputs(os.path.join(self.root.name, output))
+
+    def test_export_configs(self):
+        self.assertEqual([None], export_configs(dict()))
+        self.assertEqual(
+            [{"style": "readme"}, {"style": "project_index"}],
+            export_configs({"exports": ["readme", "project_index"]}),
+        )
+        with self.assertRaises(ValueError):
+            export_configs({"exports": [{"jobs": 2}]})
+
+    def test_exporter_config(self):
+        project = self.project("out")
+        exporter = GfmExporter(project, {"output_directory": "docs"})
+        self.assertEqual(
+            os.path.join(self.source, "docs"), exporter.output_path
+        )
+        self.assertEqual(project.output_path, GfmExporter(project).output_path)
+
+    def test_exports(self):
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                # Every export renders what a run of its own settings would
+                single = "single-{}".format(jobs)
+                output_path = os.path.join(self.root.name, single)
+                for export in export_configs(
+                    {"exports": exports(output_path)}
+                ):
+                    self.project(single, **export).process()
+
+                output = "exports-{}".format(jobs)
+                output_path = os.path.join(self.root.name, output)
+                status = self.project(
+                    output, exports=exports(output_path), export_jobs=jobs
+                ).process()
+                self.assertEqual(3, status.props["exports"])
+                self.assertEqual(5, status.props["outputs_written"])
+                expected = self.outputs(single)
+                self.assertEqual(5, len(expected))
+                self.assertEqual(expected, self.outputs(output))
+
+    def test_same_output(self):
+        project = self.project("out", exports=["readme", "project_index"])
+        with self.assertRaises(ValueError):
+            project.process()
+
+        # Per-file outputs of the two exports would collide too
+        exports = [
+            {"style": "readme", "publish_single_file": False},
+            {
+                "style": "project_index",
+                "publish_single_file": False,
+                "output_file_name": "INDEX.md",
+            },
+        ]
+        project = self.project("per-file", exports=exports)
+        with self.assertRaises(ValueError):
+            project.process()
+        self.assertEqual(dict(), self.outputs("per-file"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,165 @@
+import os
+import tempfile
 import unittest
 
 from cxmeta.pipeline.gfm_exporter import GfmExporter
+from cxmeta.pipeline.writer import (
+    OutputWriter,
+    encode_output,
+    encoded_offsets,
+)
 from cxmeta.config.project import Project
 from cxmeta.config.config_loader import ConfigLoader
+from cxmeta.style.gfm_common import GfmStyle, stripped_parts
+from cxmeta.style.gfm_readme import GfmReadmeStyle
+from test.test_template import read_outputs
 
 
 class TestGfmExporter(unittest.TestCase):
     def test_simple(self):
         GfmExporter(Project(config=ConfigLoader().default_config()))
 
+    def test_stripped_parts(self):
+        for parts in (
+            ["  a", "b ", "\n", " "],
+            ["\n", " x", "\n"],
+            [" ", "\n"],
+            ["a"],
+            [],
+        ):
+            with self.subTest(parts=parts):
+                text = "".join(parts)
+                self.assertEqual(text.strip(), "".join(stripped_parts(parts)))
+                self.assertEqual(
+                    text.rstrip(),
+                    "".join(stripped_parts(parts, leading=False)),
+                )
+
+    def test_style_without_render_chunk(self):
+        # Styles that only implement chunk still render through the parts
+        class ChunkOnlyStyle(GfmReadmeStyle):
+            def chunk(self, module, source_file, chunk):
+                return "<{}>".format(chunk.line_num)
+
+            render_chunk = GfmStyle.render_chunk
+
+        with tempfile.TemporaryDirectory() as root:
+            with open(os.path.join(root, "a.h"), "w") as f:
+                f.write("// One\nvoid one();\n\n// Two\nvoid two();\n")
+            project = Project(config=ConfigLoader(root).default_config())
+            exporter = GfmExporter(project)
+            exporter.style = ChunkOnlyStyle(project)
+            exporter.export_module(project.load_module())
+            with open(os.path.join(root, "README.md")) as f:
+                self.assertEqual("<1><4>", f.read())
+
+    def test_project_index_without_names(self):
+        # A page header comment and a bare define have no declared names
+        with tempfile.TemporaryDirectory() as root:
+            with open(os.path.join(root, "a.h"), "w") as f:
+                f.write("// Page header\n\n// Flag\n#define FLAG\n")
+            config = ConfigLoader(root).default_config()
+            config["style"] = "project_index"
+            Project(config=config).process()
+            with open(os.path.join(root, "README.md")) as f:
+                output = f.read()
+        self.assertIn(":link: [a.h](a.h)\n\nPage header\n", output)
+        self.assertIn("#### `FLAG` (macro)\n\nFlag\n", output)
+
+    def test_per_file_outputs(self):
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, "inc"))
+            for name in ("a.h", "b.h", "inc/c.h"):
+                with open(os.path.join(root, name), "w") as f:
+                    f.write("// Doc for {0}\nvoid {0}();\n".format(name[-3]))
+
+            outputs = dict()
+            for write_jobs in (1, 4):
+                output_path = os.path.join(root, "out-{}".format(write_jobs))
+                config = ConfigLoader(root).default_config()
+                config.update(
+                    {
+                        "include_paths": ["inc"],
+                        "publish_single_file": False,
+                        "output_path": output_path,
+                        "write_jobs": write_jobs,
+                    }
+                )
+                Project(config=config).process()
+                outputs[write_jobs] = read_outputs(output_path)
+                # No temporary files are left behind
+                self.assertEqual(
+                    ["README.md", "a.md", "b.md", "c.md"],
+                    sorted(os.listdir(output_path)),
+                )
+            self.assertIn("Doc for c", outputs[1]["c.md"])
+            self.assertEqual(outputs[1], outputs[4])
+
+    def test_skip_unchanged(self):
+        with tempfile.TemporaryDirectory() as root:
+            for name in ("a.h", "b.h"):
+                with open(os.path.join(root, name), "w") as f:
+                    f.write("// Doc for {0}\nvoid {0}();\n".format(name[0]))
+            config = ConfigLoader(root).default_config()
+            config.update(
+                {
+                    "publish_single_file": False,
+                    "output_path": os.path.join(root, "out"),
+                    "skip_unchanged": True,
+                }
+            )
+            status = Project(config=config).process()
+            self.assertEqual(3, status.props["outputs_written"])
+            self.assertEqual(0, status.props["outputs_skipped"])
+
+            output = os.path.join(root, "out", "a.md")
+            os.utime(output, (0, 0))
+            with open(os.path.join(root, "b.h"), "w") as f:
+                f.write("// Changed\nvoid b();\n")
+            status = Project(config=config).process()
+            self.assertEqual(1, status.props["outputs_written"])
+            self.assertEqual(2, status.props["outputs_skipped"])
+            self.assertEqual(0, os.stat(output).st_mtime)
+
+
+class TestOutputWriter(unittest.TestCase):
+    def test_concurrent_writes(self):
+        with tempfile.TemporaryDirectory() as root:
+            with OutputWriter(jobs=3) as writer:
+                for i in range(20):
+                    path = os.path.join(root, "sub", "{}.md".format(i))
+                    writer.submit(path, "output {}\n".format(i))
+            self.assertEqual(20, writer.written)
+            self.assertEqual(20, len(os.listdir(os.path.join(root, "sub"))))
+            with open(os.path.join(root, "sub", "7.md")) as f:
+                self.assertEqual("output 7\n", f.read())
+
+    def test_write_error(self):
+        with tempfile.TemporaryDirectory() as root:
+            blocker = os.path.join(root, "file")
+            with open(blocker, "w"):
+                pass
+            with self.assertRaises(OSError):
+                with OutputWriter(jobs=2) as writer:
+                    writer.submit(os.path.join(blocker, "a.md"), "text")
+            # A write error does not hide the error of the rendering
+            with self.assertRaises(KeyError):
+                with OutputWriter(jobs=2) as writer:
+                    writer.submit(os.path.join(blocker, "a.md"), "text")
+                    raise KeyError("render")
+            with self.assertRaises(KeyError):
+                with OutputWriter() as writer:
+                    raise KeyError("render")
+
+    def test_encoded_offsets(self):
+        text = "a\n✓\nb\nc"
+        offsets = [text.index("b"), text.index("c")]
+        for newline in ("\n", "\r\n"):
+            with self.subTest(newline=newline):
+                data = encode_output(text, newline)
+                positions = encoded_offsets(text, offsets, newline)
+                self.assertEqual(list(b"bc"), [data[p] for p in positions])
+
 
 if __name__ == "__main__":
     unittest.main()
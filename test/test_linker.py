@@ -0,0 +1,138 @@
+import os
+import tempfile
+import unittest
+
+from cxmeta.config.project import Project
+from cxmeta.config.config_loader import ConfigLoader
+from cxmeta.pipeline.linker import Linker
+from cxmeta.pipeline.stream import Chunk
+from cxmeta.style.gfm_common import gfm_anchor
+
+WIDGET = """
+// A widget
+struct widget {
+    int id;
+};
+
+// Create a widget, see widget_destroy
+struct widget *widget_create(int id);
+
+// Destroy a widget
+void widget_destroy(struct widget *w);
+"""
+
+USER = """
+// Uses widget_create, not `widget_create` or [widget](#widget)
+void use_widget(void);
+"""
+
+
+class TestLinker(unittest.TestCase):
+    def test_anchor(self):
+        self.assertEqual(
+            "widget-widget_create", gfm_anchor("widget widget_create")
+        )
+        self.assertEqual("a-struct", gfm_anchor("`a` (struct)"))
+
+    def test_link_text(self):
+        linker = Linker()
+        linker.add("a", "out/README.md", "a")
+        linker.add("b", "out/sub/b.md", "void-b")
+        self.assertEqual(
+            "see [a](#a) and [b](sub/b.md#void-b) not c",
+            linker.link_text("see a and b not c", "out/README.md"),
+        )
+        self.assertEqual(
+            "`a` [a](x) [a](../README.md#a) b",
+            linker.link_text("`a` [a](x) a b", "out/sub/b.md", skip="b"),
+        )
+
+    def test_chunk_is_not_modified(self):
+        linker = Linker()
+        linker.add("a", "README.md", "a")
+        chunk = Chunk()
+        chunk.docs = ["uses a\n"]
+        linked = linker.link_chunk(chunk, "README.md")
+        self.assertEqual(["uses a\n"], chunk.docs)
+        self.assertEqual(["uses [a](#a)\n"], linked.docs)
+        self.assertIs(chunk, linker.link_chunk(chunk, "README.md", skip="a"))
+
+    def test_links_and_html_are_not_linked(self):
+        linker = Linker()
+        for name in ("init", "com", "docs", "div"):
+            linker.add(name, "README.md", name)
+        for text in (
+            "https://example.com/docs/init",
+            "www.example.com/init",
+            "<https://example.com/init>",
+            "<init@example.com>",
+            "init@example.com",
+            "[init][docs]",
+            "[init]",
+            "[init]: https://example.com/init",
+            '<div class="init">',
+            "</div>",
+            "<!-- init -->",
+        ):
+            with self.subTest(text=text):
+                self.assertEqual(
+                    text + "\n[init](#init)",
+                    linker.link_text(text + "\ninit", "README.md"),
+                )
+
+    def test_code_is_not_linked(self):
+        linker = Linker()
+        linker.add("a", "README.md", "a")
+        text = "a\n```c\na();\n```\n\n    a();\n\na\n~~~\na\n~~~\n\tb\n"
+        self.assertEqual(
+            "[a](#a)\n```c\na();\n```\n\n    a();\n\n[a](#a)\n"
+            "~~~\na\n~~~\n\tb\n",
+            linker.link_text(text, "README.md"),
+        )
+
+    def export(self, root, **settings):
+        for name, text in (("widget.h", WIDGET), ("user.h", USER)):
+            with open(os.path.join(root, name), "w") as f:
+                f.write(text)
+        config = ConfigLoader(root).default_config()
+        config["cross_reference"] = True
+        config.update(settings)
+        Project(config=config).process()
+
+    def test_single_file(self):
+        with tempfile.TemporaryDirectory() as root:
+            self.export(root)
+            with open(os.path.join(root, "README.md")) as f:
+                output = f.read()
+        self.assertIn(
+            "Uses [widget_create](#widget-widget_create), not "
+            "`widget_create` or [widget](#widget)",
+            output,
+        )
+        self.assertIn("see [widget_destroy](#void-widget_destroy)", output)
+        # Names are not linked in their own docs
+        self.assertIn("A widget\n", output)
+
+    def test_per_file(self):
+        with tempfile.TemporaryDirectory() as root:
+            self.export(root, publish_single_file=False)
+            with open(os.path.join(root, "user.md")) as f:
+                output = f.read()
+        self.assertIn(
+            "Uses [widget_create](widget.md#widget-widget_create)", output
+        )
+
+    def test_heading_numbering(self):
+        with tempfile.TemporaryDirectory() as root:
+            # Headings of the project header come first in the output
+            with open(os.path.join(root, "HEADER.md"), "w") as f:
+                f.write("# widget widget_create\n\n```\n# widget\n```\n")
+            self.export(root, project_header="HEADER.md")
+            with open(os.path.join(root, "README.md")) as f:
+                output = f.read()
+        self.assertIn("[widget_create](#widget-widget_create-1)", output)
+        self.assertIn("[widget](#widget)", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import tempfile
+import unittest
+
+from cxmeta.config.project import Project
+from cxmeta.config.config_loader import ConfigLoader
+
+
+class TestMetrics(unittest.TestCase):
+    def test_project_metrics(self):
+        with tempfile.TemporaryDirectory() as root:
+            for i in range(3):
+                with open(os.path.join(root, "h{}.h".format(i)), "w") as f:
+                    f.write("// Doc\nvoid f{}();\n\n".format(i) * (i + 1))
+            config = ConfigLoader(root).default_config()
+            config["metrics"] = True
+            status = Project(config=config).process()
+
+        stages = status.props["stages"]
+        for name in ("discover", "process", "tokenize", "combine", "export"):
+            self.assertIn(name, stages)
+            self.assertTrue(stages[name]["seconds"] >= 0)
+        self.assertEqual(3, stages["discover"]["files"])
+        self.assertEqual(18, stages["tokenize"]["lines"])
+        self.assertEqual(6, stages["combine"]["chunks"])
+
+        slowest = status.metrics.slowest(2)
+        self.assertEqual(2, len(slowest))
+        self.assertTrue(slowest[0].seconds >= slowest[1].seconds)
+        self.assertTrue(all(m.atoms > 0 for m in slowest))
+
+    def test_disabled(self):
+        config = ConfigLoader(".").default_config()
+        project = Project(config=config)
+        self.assertIsNone(project.metrics)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+
+from cxmeta.config.config_loader import ConfigLoader
+from cxmeta.config.project import Project
+from cxmeta.pipeline.rst_processor import RstProcessor, get_rst_parser
+from cxmeta.pipeline.stream import Chunk
+
+DOCS = [
+    "Create a widget.\n\n:param id: the id\n"
+    ":returns: a `widget <https://example.com/w>`_\n",
+    "    Indented start\n\nSee widget_ and https://example.com\n",
+    "Title\n=====\n\n:note: sections nest the docs that follow\n",
+    "Literal::\n\n    :not: a field\n",
+    ".. cxmeta-directive:: title\n   Widget\n\n:ok: yes\n",
+]
+
+
+def make_chunks(docs):
+    chunks = list()
+    for doc in docs:
+        chunk = Chunk()
+        chunk.docs = [doc]
+        chunks.append(chunk)
+    return chunks
+
+
+def fields_and_references(parsed_docs):
+    return [(doc.fields, doc.references) for doc in parsed_docs]
+
+
+class TestRstProcessor(unittest.TestCase):
+    def test_fields_and_references(self):
+        parsed = RstProcessor().process(make_chunks(DOCS))
+        self.assertEqual(
+            {"param id": "the id", "returns": "a widget"}, parsed[0].fields
+        )
+        self.assertEqual(["https://example.com/w"], parsed[0].references)
+        self.assertEqual(
+            ["widget", "https://example.com"], parsed[1].references
+        )
+        self.assertEqual(
+            [
+                {"note": "sections nest the docs that follow"},
+                {},
+                {"ok": "yes"},
+            ],
+            [doc.fields for doc in parsed[2:]],
+        )
+
+    def test_batches_match_single_docs(self):
+        docs = DOCS + ["Fake\n\ncxmeta-doc-boundary-3\n\n:a: b\n"]
+        for batch_size in (2, 4, 64):
+            with self.subTest(batch_size=batch_size):
+                single = RstProcessor(batch_size=1).process(make_chunks(docs))
+                batched = RstProcessor(batch_size=batch_size).process(
+                    make_chunks(docs)
+                )
+                self.assertEqual(
+                    fields_and_references(single),
+                    fields_and_references(batched),
+                )
+
+    def test_cache(self):
+        processor = RstProcessor()
+        parsed = processor.process(make_chunks(DOCS + DOCS[:2] + [""]))
+        self.assertEqual(len(DOCS) + 3, len(parsed))
+        self.assertIs(parsed[0], parsed[len(DOCS)])
+        self.assertEqual(dict(), parsed[-1].fields)
+        self.assertEqual(len(DOCS), processor.props()["rst_parsed"])
+        self.assertEqual(0, processor.props()["rst_cached"])
+        parsed = processor.process(make_chunks(DOCS))
+        self.assertEqual(len(DOCS), processor.props()["rst_cached"])
+        self.assertEqual("the id", parsed[0].fields["param id"])
+
+    def test_shared_parser(self):
+        self.assertIs(get_rst_parser(), RstProcessor().parser)
+        self.assertIs(RstProcessor().parser, RstProcessor().parser)
+
+    def test_project(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "widget.h")
+            with open(path, "w") as f:
+                f.write(
+                    "// Create a widget\n//\n// :param id: the id\n"
+                    "struct widget *widget_create(int id);\n"
+                )
+            config = ConfigLoader(root).default_config()
+            status = Project(config=config).process()
+            self.assertNotIn("rst_parsed", status.props)
+
+            config["rst_processing"] = True
+            project = Project(config=config)
+            status = project.process()
+            self.assertEqual(1, status.props["rst_parsed"])
+            self.assertEqual(1, status.props["rst_fields"])
+            (doc,) = project.rst_docs[path]
+            self.assertEqual({"param id": "the id"}, doc.fields)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+
+from cxmeta.pipeline.source_module import Module
+from cxmeta.pipeline.cxx_processor import CxxProcessor
+from cxmeta.pipeline.cxx_scanner import CxxScanner
+from cxmeta.pipeline.combiner import Combiner
+from cxmeta.pipeline.stream import InputBuffer, InputDirectory, InputFile
+from cxmeta.config.project import Project
+
+from test import test_combiner, test_comments, test_macros, test_statements
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "..", "examples")
+
+edge_cases = [
+    "",
+    "\n\n",
+    "no newline at end",
+    "/* open\n * # not a macro */ int a;\n",
+    "// line comment with /* ml start\nint b; */\n",
+    "#define A(x) /* comment */ \\\n  (x)\n",
+    "/*/ odd /*/ void f(void);\n",
+    "\t// tabbed\n\tint c;\n",
+    "/**/ /***/ /* a */ /** b **/\n",
+]
+
+non_ascii_cases = [
+    "// Größe der Struktur (bytes)\nint größe; // ünits\n",
+    "/* ☃ snow */ void f(/* ☃ */ int a);\r\n// crlf line\r\nint b;\r\n",
+    "#define A(x) \\\r\n  (x) // é\r\n",
+    "",
+]
+
+
+def sample_sources():
+    for module in (test_combiner, test_comments, test_macros, test_statements):
+        for name, value in vars(module).items():
+            if type(value) is str and not name.startswith("__"):
+                yield InputBuffer(name, value)
+    for i, value in enumerate(edge_cases):
+        yield InputBuffer("edge_case_{}".format(i), value)
+    for root, _, names in os.walk(EXAMPLES):
+        for name in names:
+            if name.endswith(".h"):
+                yield InputFile(os.path.join(root, name))
+
+
+class TestScanner(unittest.TestCase):
+    def setUp(self) -> None:
+        # A config of its own, the tests change it
+        self.project = Project(config=dict())
+        self.module = Module(self.project, InputDirectory("."))
+
+    def atoms(self, processor_type, source):
+        proc = processor_type(self.project, self.module, source)
+        return [
+            (a.line_num, a.pos, a.kind, a.value)
+            for a in proc.process().stream().read()
+        ]
+
+    def test_atom_parity(self):
+        count = 0
+        for source in sample_sources():
+            with self.subTest(source=source.full_path):
+                self.assertEqual(
+                    self.atoms(CxxProcessor, source),
+                    self.atoms(CxxScanner, source),
+                )
+            count += 1
+        self.assertTrue(count > 20)
+
+    def test_read_mode_parity(self):
+        with tempfile.TemporaryDirectory() as root:
+            sources = list(sample_sources())
+            for i, text in enumerate(non_ascii_cases):
+                path = os.path.join(root, "non_ascii_{}.h".format(i))
+                with open(path, "w", encoding="utf8", newline="") as f:
+                    f.write(text)
+                sources.append(InputFile(path))
+
+            for read_mode in ("bytes", "mmap"):
+                self.project.config["read_mode"] = read_mode
+                for source in sources:
+                    with self.subTest(read_mode=read_mode, source=source):
+                        self.assertEqual(
+                            self.atoms(CxxProcessor, source),
+                            self.atoms(CxxScanner, source),
+                        )
+
+    def test_combiner_tokenizer(self):
+        self.project.config["tokenizer"] = "buffer"
+        combiner = Combiner(
+            self.project,
+            self.module,
+            InputBuffer("two_chunks", test_combiner.two_chunks),
+        )
+        self.assertIsInstance(combiner.proc, CxxScanner)
+        self.assertEqual(2, len(combiner.process().stream_data.content))
+
+    def test_unknown_tokenizer(self):
+        self.project.config["tokenizer"] = "unknown"
+        self.assertRaises(
+            ValueError,
+            Combiner,
+            self.project,
+            self.module,
+            InputBuffer("empty", ""),
+        )
+
+    def test_read_mode(self):
+        for tokenizer, read_mode in (("buffer", "mmpa"), ("line", "bytes")):
+            with self.subTest(tokenizer=tokenizer, read_mode=read_mode):
+                self.project.config["tokenizer"] = tokenizer
+                self.project.config["read_mode"] = read_mode
+                self.assertRaises(
+                    ValueError,
+                    Combiner,
+                    self.project,
+                    self.module,
+                    InputBuffer("empty", ""),
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import io
+import os
+import tempfile
+import unittest
+
+from cxmeta.config.project import Project
+from cxmeta.config.config_loader import ConfigLoader
+from cxmeta.pipeline.serialize import (
+    FileResult,
+    chunk_to_dict,
+    dump_jsonl,
+    dumps_binary,
+    load_jsonl,
+    loads_binary,
+)
+from cxmeta.pipeline.stream import Chunk
+
+HEADER = """
+// Maximum number of widgets ✓
+#define MAX_WIDGETS 16
+
+/* .. cxmeta-directive:: title
+ * A widget
+ */
+struct widget {
+    int id;
+};
+
+// Create a widget
+struct widget *widget_create(int id);
+"""
+
+
+def parse_results(root):
+    with open(os.path.join(root, "widget.h"), "w") as f:
+        f.write(HEADER)
+    project = Project(config=ConfigLoader(root).default_config())
+    module = project.load_module()
+    return [
+        FileResult(combiner.source.full_path, combiner.stream().content, "k")
+        for combiner in module.files
+    ]
+
+
+class TestSerialize(unittest.TestCase):
+    def assertSameResults(self, expected, actual):
+        self.assertEqual(len(expected), len(actual))
+        for left, right in zip(expected, actual):
+            self.assertEqual(left.full_path, right.full_path)
+            self.assertEqual(left.key, right.key)
+            self.assertEqual(
+                [chunk_to_dict(c) for c in left.chunks],
+                [chunk_to_dict(c) for c in right.chunks],
+            )
+
+    def test_binary_round_trip(self):
+        with tempfile.TemporaryDirectory() as root:
+            results = parse_results(root)
+            self.assertTrue(results[0].chunks)
+            self.assertSameResults(
+                results, loads_binary(dumps_binary(results))
+            )
+
+    def test_jsonl_round_trip(self):
+        with tempfile.TemporaryDirectory() as root:
+            results = parse_results(root)
+            stream = io.StringIO()
+            dump_jsonl(results, stream)
+            stream.seek(0)
+            self.assertSameResults(results, load_jsonl(stream))
+
+    def test_empty(self):
+        empty = [FileResult("a.h", [Chunk()])]
+        self.assertSameResults(empty, loads_binary(dumps_binary(empty)))
+        self.assertEqual([], loads_binary(dumps_binary([])))
+
+    def test_bad_data(self):
+        data = dumps_binary([FileResult("a.h", [Chunk()], "k")])
+        for bad in [b"", b"XXXX" + data[4:], data[:-3]]:
+            with self.subTest(bad=bad):
+                with self.assertRaises(ValueError):
+                    loads_binary(bad)
+        # The version follows the magic
+        with self.assertRaises(ValueError):
+            loads_binary(data[:4] + b"\xff\xff" + data[6:])
+        with self.assertRaises(ValueError):
+            load_jsonl(io.StringIO('{"format": "other"}\n'))
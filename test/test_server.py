@@ -0,0 +1,107 @@
+import os
+import json
+import tempfile
+import threading
+import unittest
+from http.client import HTTPConnection
+
+from cxmeta.tools.server import HOST, create_server, request
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root = tempfile.TemporaryDirectory()
+        for name in ("a.h", "b.h"):
+            self.write(name, "// Doc for {0}\nvoid {0}();\n".format(name[0]))
+        self.server = create_server(0, {"output_path": self.path("out")})
+        self.port = self.server.server_port
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self) -> None:
+        request(self.port, "/shutdown", dict())
+        self.thread.join()
+        self.server.server_close()
+        self.root.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.root.name, name)
+
+    def write(self, name, text):
+        with open(self.path(name), "w") as f:
+            f.write(text)
+
+    def test_render(self):
+        reply = request(self.port, "/render", {"path": self.root.name})
+        self.assertTrue(reply["success"])
+        self.assertIn("Doc for a", reply["markdown"])
+        self.assertIn("Doc for b", reply["markdown"])
+        # Outputs are only rendered in memory
+        self.assertFalse(os.path.exists(self.path("out")))
+
+        self.write("b.h", "// Changed doc\nvoid b();\n")
+        os.utime(self.path("b.h"), ns=(0, 0))
+        reply = request(self.port, "/render", {"path": self.path("b.h")})
+        self.assertIn("Changed doc", reply["markdown"])
+        self.assertNotIn("Doc for a", reply["markdown"])
+
+        reply = request(self.port, "/status")
+        self.assertEqual(
+            {"files": 2}, reply["projects"][os.path.abspath(self.root.name)]
+        )
+
+    def test_symbol_index(self):
+        self.write(
+            ".cxmeta.yaml",
+            "symbol_index: symbols.json\ncross_reference: true\n"
+            "publish_single_file: false\n",
+        )
+        for path in (self.root.name, self.path("a.h")):
+            with self.subTest(path=path):
+                reply = request(self.port, "/render", {"path": path})
+                self.assertTrue(reply["success"], reply.get("error"))
+        self.assertIn("Doc for a", reply["markdown"])
+        self.assertFalse(os.path.exists(self.path("out")))
+
+    def test_unknown_source(self):
+        reply = request(self.port, "/render", {"path": self.path("c.h")})
+        self.assertFalse(reply["success"])
+
+    def send(self, headers):
+        connection = HTTPConnection(HOST, self.port)
+        body = json.dumps({"path": self.root.name})
+        connection.request("POST", "/render", body, headers)
+        response = connection.getresponse()
+        reply = json.load(response)
+        connection.close()
+        return response.status, reply
+
+    def test_rejected(self):
+        host = "{}:{}".format(HOST, self.port)
+        for status, headers in (
+            (
+                403,
+                {"Host": "evil.example", "Content-Type": "application/json"},
+            ),
+            (415, {"Host": host, "Content-Type": "text/plain"}),
+        ):
+            with self.subTest(status=status):
+                code, reply = self.send(headers)
+                self.assertEqual(status, code)
+                self.assertFalse(reply["success"])
+        self.assertFalse(os.path.exists(self.path("out")))
+        headers = {"Host": host, "Content-Type": "application/json"}
+        self.assertEqual(200, self.send(headers)[0])
+
+    def test_internal_error(self):
+        def render(path, project_path=None):
+            raise AssertionError("broken pipeline")
+
+        self.server.cxm.render = render
+        reply = request(self.port, "/render", {"path": self.root.name})
+        self.assertFalse(reply["success"])
+        self.assertIn("broken pipeline", reply["message"])
+
+
+if __name__ == "__main__":
+    unittest.main()
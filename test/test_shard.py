@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+
+from cxmeta.config.config_loader import ConfigLoader
+from cxmeta.config.project import Project
+from cxmeta.config.shard import Shard, merge_shards, parse_shard, shard_of
+from cxmeta.pipeline import cache
+
+
+class TestShard(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.root.name, "src")
+        os.makedirs(os.path.join(self.source, "sub"))
+        for name in ("a.h", "b.h", "c.h", "d.h", "sub/e.h"):
+            with open(os.path.join(self.source, name), "w") as f:
+                f.write("// Docs of {0}\nvoid {0}(int x);\n".format(name[-3]))
+
+    def tearDown(self) -> None:
+        self.root.cleanup()
+
+    def project(self, **settings):
+        config = ConfigLoader(self.source).default_config()
+        config["include_paths"] = ["sub"]
+        config.update(settings)
+        return Project(config=config)
+
+    def readme(self):
+        with open(os.path.join(self.source, "README.md")) as f:
+            return f.read()
+
+    def test_parse_shard(self):
+        self.assertEqual((1, 4), parse_shard("1/4"))
+        for text in ("4/4", "-1/4", "0/0", "1", "a/b"):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    parse_shard(text)
+
+    def test_partition(self):
+        names = ["f{}.h".format(i) for i in range(100)]
+        shards = [shard_of(name, 4) for name in names]
+        self.assertEqual(shards, [shard_of(name, 4) for name in names])
+        self.assertEqual({0, 1, 2, 3}, set(shards))
+
+    def test_merge(self):
+        self.project().process()
+        expected = self.readme()
+        self.assertIn("Docs of e", expected)
+        os.remove(os.path.join(self.source, "README.md"))
+
+        paths = list()
+        counts = list()
+        for index in range(3):
+            path = os.path.join(self.root.name, "s{}.chunks".format(index))
+            status = Shard(self.project(), index, 3).process(path)
+            counts.append(status.props["shard_files"])
+            paths.append(path)
+        self.assertEqual(5, sum(counts))
+        self.assertFalse(
+            os.path.exists(os.path.join(self.source, "README.md"))
+        )
+
+        status = merge_shards(self.project(), paths)
+        self.assertEqual(5, status.props["shard_files"])
+        self.assertEqual(0, status.props["local_files"])
+        self.assertEqual(expected, self.readme())
+
+    def test_merge_missing(self):
+        self.project().process()
+        expected = self.readme()
+        path = os.path.join(self.root.name, "s.chunks")
+        Shard(self.project(), 0, 1).process(path)
+
+        # Changed files are processed again rather than merged
+        with open(os.path.join(self.source, "a.h"), "a") as f:
+            f.write("// More\nvoid more();\n")
+        status = merge_shards(self.project(), [path])
+        self.assertEqual(1, status.props["local_files"])
+        self.assertNotEqual(expected, self.readme())
+        self.assertIn("more", self.readme())
+
+    def test_merge_settings(self):
+        path = os.path.join(self.root.name, "s.chunks")
+        Shard(self.project(), 0, 1).process(path)
+
+        # The merge node may render with settings of its own
+        project = self.project(skip_unchanged=True, write_jobs=2)
+        status = merge_shards(project, [path])
+        self.assertEqual(0, status.props["local_files"])
+
+        # Chunks of another parser version are processed again
+        previous = cache.CACHE_FORMAT
+        cache.CACHE_FORMAT = previous + 1
+        try:
+            status = merge_shards(self.project(), [path])
+        finally:
+            cache.CACHE_FORMAT = previous
+        self.assertEqual(5, status.props["local_files"])
@@ -0,0 +1,64 @@
+import os
+import sys
+import json
+import subprocess
+import unittest
+
+from cxmeta.tools.bench import STARTUP_BUDGET_MS, bench_startup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not be imported until a project is processed
+DEFERRED = (
+    "yaml",
+    "docutils",
+    "colorlog",
+    "cxmeta.pipeline.builder",
+    "cxmeta.pipeline.combiner",
+    "cxmeta.pipeline.gfm_exporter",
+    "cxmeta.style.gfm_readme",
+    "cxmeta.style.gfm_project_index",
+)
+
+
+class TestStartup(unittest.TestCase):
+    def imported_modules(self, code):
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        output = subprocess.check_output(
+            [
+                sys.executable,
+                "-c",
+                code + "\nimport sys, json\n"
+                "print(json.dumps(sorted(sys.modules)))",
+            ],
+            env=env,
+        )
+        return set(json.loads(output))
+
+    def test_cli_import(self):
+        modules = self.imported_modules("import cxmeta.tools.cli")
+        for name in DEFERRED:
+            self.assertNotIn(name, modules)
+
+    def test_style_lookup(self):
+        modules = self.imported_modules(
+            "from cxmeta.style.registry import get_style_type\n"
+            "assert get_style_type('readme').__name__ == 'GfmReadmeStyle'\n"
+            "assert get_style_type('unknown') is None"
+        )
+        self.assertIn("cxmeta.style.gfm_readme", modules)
+        self.assertNotIn("cxmeta.style.gfm_project_index", modules)
+
+    def test_import_budget(self):
+        # The best of a few runs keeps a busy machine from failing it
+        result = bench_startup(3, STARTUP_BUDGET_MS)
+        self.assertTrue(
+            result["within_budget"],
+            "Importing {} took {} ms, the budget is {} ms".format(
+                result["module"], result["best_ms"], STARTUP_BUDGET_MS
+            ),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
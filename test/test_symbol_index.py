@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+from cxmeta.config.project import Project
+from cxmeta.config.config_loader import ConfigLoader
+from cxmeta.pipeline.symbol_index import Symbol, SymbolIndex
+
+HEADER = """
+// Maximum number of widgets
+#define MAX_WIDGETS 16
+
+// A widget, ✓ non-ASCII docs move byte offsets
+struct widget {
+    int id;
+};
+
+// Create a widget
+struct widget *widget_create(int id);
+"""
+
+
+class TestSymbolIndex(unittest.TestCase):
+    def test_round_trip(self):
+        index = SymbolIndex()
+        index.add(Symbol("a", "m", "a.h", 3, ["function"], "README.md", 10))
+        index.add(Symbol("a", "n", "n/a.h", 5, [], "README.md", 90))
+        loaded = SymbolIndex.loads(index.dumps())
+        self.assertEqual(2, len(loaded))
+        self.assertEqual(index.lookup("a"), loaded.lookup("a"))
+        self.assertEqual([], loaded.lookup("b"))
+
+    def test_bad_header(self):
+        with self.assertRaises(ValueError):
+            SymbolIndex.loads('{"format": "other"}\n')
+
+    def test_export(self):
+        with tempfile.TemporaryDirectory() as root:
+            with open(os.path.join(root, "widget.h"), "w") as f:
+                f.write(HEADER)
+            config = ConfigLoader(root).default_config()
+            config["symbol_index"] = "symbols.jsonl"
+            Project(config=config).process()
+
+            index = SymbolIndex.load(os.path.join(root, "symbols.jsonl"))
+            with open(os.path.join(root, "README.md"), "rb") as f:
+                output = f.read()
+
+            macro = index.lookup("MAX_WIDGETS")[0]
+            self.assertEqual("widget.h", macro.file)
+            self.assertEqual(2, macro.line)
+            self.assertIn("macro", macro.types)
+
+            function = index.lookup("widget_create")[0]
+            self.assertEqual("README.md", function.output)
+            self.assertEqual(10, function.line)
+            # Offsets are in bytes of the file, to seek or slice an mmap
+            offset = function.offset
+            self.assertTrue(
+                output[offset:].startswith(b"### widget widget_create")
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import os
+import tempfile
+import unittest
+
+from cxmeta.config.project import Project
+from cxmeta.config.config_loader import ConfigLoader
+from cxmeta.pipeline.gfm_exporter import GfmExporter
+from cxmeta.style.registry import STYLES
+from cxmeta.style.template import CHUNK_FIELDS, TemplateStyle, parse_template
+from cxmeta.tools.corpus import COMMENT_UNIT, MIXED_UNIT, synthetic_header
+
+PARITY = [
+    ("readme", "readme_template"),
+    ("project_index", "project_index_template"),
+]
+
+
+def read_outputs(output_path):
+    """The text of every file under output_path by relative path"""
+    outputs = dict()
+    for directory, _, names in os.walk(output_path):
+        for name in names:
+            path = os.path.join(directory, name)
+            with open(path) as f:
+                outputs[os.path.relpath(path, output_path)] = f.read()
+    return outputs
+
+
+class BadHeadingStyle(TemplateStyle):
+    TEMPLATES = {"heading": "{source_path}", "chunk": "{heading}"}
+
+
+class TestTemplateStyle(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.root.name, "module")
+        os.makedirs(os.path.join(self.source, "sub"))
+        headers = {
+            "a.h": synthetic_header(3, MIXED_UNIT),
+            "b.h": synthetic_header(3, COMMENT_UNIT),
+            "sub/c.h": "// Whitespace only code\n    \n\n// Macro\n"
+            "#define C 1\n",
+        }
+        for name, text in headers.items():
+            with open(os.path.join(self.source, name), "w") as f:
+                f.write(text)
+
+    def tearDown(self) -> None:
+        self.root.cleanup()
+
+    def export(self, style, **settings):
+        output_path = os.path.join(self.root.name, style)
+        config = ConfigLoader(self.source).default_config()
+        config.update({"style": style, "output_path": output_path})
+        config.update(settings)
+        Project(config=config).process()
+        return read_outputs(output_path)
+
+    def test_parity(self):
+        for settings in (
+            dict(),
+            {"publish_single_file": False},
+            {"cross_reference": True, "newline": "\r\n"},
+        ):
+            # The sub-module has chunks without a name
+            settings["include_paths"] = ["sub"]
+            for style, template_style in PARITY:
+                with self.subTest(style=style, settings=settings):
+                    expected = self.export(style, **settings)
+                    self.assertTrue(expected)
+                    self.assertEqual(
+                        expected, self.export(template_style, **settings)
+                    )
+
+    def test_custom_style(self):
+        class ListStyle(TemplateStyle):
+            TEMPLATES = {
+                "heading": "{last_name}",
+                "start_source_file": "# {source_path}{newline}",
+                "chunk": "- {heading}{newline}",
+            }
+
+        project = Project(config=ConfigLoader(self.source).default_config())
+        style = ListStyle(project)
+        module = project.load_module()
+        output = [style.start_source_file(module, module.files[0])]
+        for chunk in module.files[0].stream().read():
+            style.render_chunk(output, module, module.files[0], chunk)
+        self.assertEqual(
+            "# a.h\n- function_0\n- x\n- function_1\n- x\n- function_2\n- x\n",
+            "".join(output),
+        )
+
+    def test_parse_template(self):
+        self.assertEqual(
+            [("text", "{a}\n"), ("if", "b", [("field", "b")])],
+            parse_template("{{a}}{newline}{?b}{b}{/b}", "\n"),
+        )
+        for text in ("{?a}", "{/a}", "{?a}{/b}"):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    parse_template(text, "\n")
+
+    def test_unknown_field(self):
+        class BadStyle(TemplateStyle):
+            TEMPLATES = {"chunk": "{unknown}"}
+
+        with self.assertRaises(ValueError):
+            BadStyle(Project())
+
+    def test_heading_fields(self):
+        # The heading is rendered from the chunk alone, for cross references
+        for heading in (
+            "{source_path} {last_name}",
+            "{heading}",
+            "{?heading}",
+        ):
+            with self.subTest(heading=heading):
+                with self.assertRaises(ValueError):
+                    parse_template(heading, "\n", fields=CHUNK_FIELDS)
+
+    def test_exporter_construction(self):
+        # Templates are compiled with the style, before anything is rendered
+        STYLES["bad_template"] = "test.test_template:BadHeadingStyle"
+        try:
+            config = ConfigLoader(self.source).default_config()
+            config["style"] = "bad_template"
+            with self.assertRaises(ValueError):
+                GfmExporter(Project(config=config))
+        finally:
+            del STYLES["bad_template"]
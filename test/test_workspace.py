@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+
+from cxmeta.config.project import Project
+from cxmeta.config.config_loader import ConfigLoader
+from cxmeta.config.workspace import Workspace
+
+
+class TestWorkspace(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root = tempfile.TemporaryDirectory()
+        for name in ("a.h", "b.h", "c.h"):
+            self.write(name, "// Doc for {0}\nvoid {0}();\n".format(name[0]))
+
+    def tearDown(self) -> None:
+        self.root.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.root.name, name)
+
+    def write(self, name, text):
+        with open(self.path(name), "w") as f:
+            f.write(text)
+
+    def read(self, name):
+        with open(self.path(os.path.join("out", name))) as f:
+            return f.read()
+
+    def workspace(self, **settings):
+        config = ConfigLoader(self.root.name).default_config()
+        config["output_path"] = self.path("out")
+        config.update(settings)
+        workspace = Workspace(Project(config=config))
+        workspace.load()
+        return workspace
+
+    def test_no_changes(self):
+        self.assertIsNone(self.workspace().update())
+
+    def test_changed_file(self):
+        workspace = self.workspace(publish_single_file=False)
+        first = workspace.module.files[0]
+        self.write("b.h", "// Changed doc\nvoid b();\n")
+        os.utime(self.path("b.h"), ns=(0, 0))
+
+        status = workspace.update()
+        self.assertEqual(1, status.props["changed_files"])
+        # Only the module output and the changed source are written
+        self.assertEqual(2, status.props["outputs_written"])
+        self.assertIs(first, workspace.module.files[0])
+        self.assertIn("Changed doc", self.read("b.md"))
+        self.assertIsNone(workspace.update())
+
+    def test_added_and_removed_files(self):
+        workspace = self.workspace()
+        os.remove(self.path("a.h"))
+        self.write("d.h", "// Doc for d\nvoid d();\n")
+        # Directory modification times may not change within the same tick
+        workspace.directories[self.root.name] = None
+
+        status = workspace.update()
+        self.assertEqual(2, status.props["changed_files"])
+        self.assertEqual(
+            ["b.h", "c.h", "d.h"],
+            [
+                os.path.basename(c.source.full_path)
+                for c in workspace.module.files
+            ],
+        )
+        output = self.read("README.md")
+        self.assertIn("Doc for d", output)
+        self.assertNotIn("Doc for a", output)
+
+
+if __name__ == "__main__":
+    unittest.main()